@@ -0,0 +1,57 @@
+import unittest
+from copy import copy
+from datetime import timedelta
+
+import numpy as np
+
+from vnpy_chart.axis import DatetimeTicks
+from vnpy_chart.manager import BarManager
+from tests.data import get_test_bars
+
+
+class TestAxis(unittest.TestCase):
+    def setUp(self):
+        self.bars = get_test_bars()
+        self.manager = BarManager()
+        self.manager.update_history(self.bars)
+        self.ticks = DatetimeTicks(self.manager)
+
+    def testBoundaries(self):
+        count = len(self.bars)
+        months = [
+            ix for ix in range(1, count)
+            if self.bars[ix].datetime.month != self.bars[ix - 1].datetime.month
+        ]
+
+        # Boundaries computed for part of bars are the same as for all bars
+        part = self.ticks.get_boundaries("month", count // 2, count - 1)
+        self.assertEqual(part.tolist(), [ix for ix in months if ix >= count // 2])
+        self.assertEqual(self.ticks.get_boundaries("month", 0, count - 1).tolist(), months)
+        self.assertEqual(len(self.ticks.get_boundaries("day", 0, count - 1)), count - 1)
+
+        labels = self.ticks.get_labels(months[:2], "%Y-%m")
+        self.assertEqual(labels, [self.bars[ix].datetime.strftime("%Y-%m") for ix in months[:2]])
+
+    def testUpdateRange(self):
+        count = len(self.bars)
+        self.ticks.get_boundaries("day", 0, count - 1)
+        self.ticks.get_labels([count - 1], "%Y-%m-%d")
+
+        # New bar after a long gap starts a new session and a new month
+        bar = copy(self.bars[-1])
+        bar.datetime += timedelta(days=40)
+        self.manager.update_history([bar])
+
+        for level in ["session", "day", "month"]:
+            boundaries = self.ticks.get_boundaries(level, 0, count)
+            self.assertEqual(boundaries[-1], count)
+
+        self.assertEqual(
+            self.ticks.get_labels([count], "%Y-%m-%d"),
+            [bar.datetime.strftime("%Y-%m-%d")]
+        )
+        self.assertTrue(np.all(np.diff(self.ticks.get_boundaries("day", 0, count)) > 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+from copy import copy
+
+from vnpy_chart.bar_queue import BarQueue
+from tests.data import get_test_bars
+
+
+class TestBarQueue(unittest.TestCase):
+    def testPush(self):
+        bars = get_test_bars()
+        queue = BarQueue(max_size=2)
+
+        self.assertTrue(queue.push(bars[0]))
+        self.assertFalse(queue.push(bars[1]))
+
+        last = copy(bars[1])
+        last.close_price += 1
+        queue.push(last)
+        queue.push(bars[2])
+
+        self.assertEqual(queue.pop_all(), [last, bars[2]])
+        self.assertEqual(queue.pop_all(), [])
+        self.assertEqual(queue.get_stats(), {"pushed": 4, "merged": 1, "dropped": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import unittest
+from copy import copy
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from vnpy.trader.ui import QtCore, QtWidgets
+
+from vnpy_chart import ChartWidget, CandleItem, VolumeItem
+from tests.data import get_test_bars
+
+
+class TestCursor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    def setUp(self):
+        self.bars = get_test_bars()
+
+        self.widget = ChartWidget()
+        self.widget.add_plot("candle", hide_x_axis=True)
+        self.widget.add_plot("volume", maximum_height=200)
+        self.widget.add_item(CandleItem, "candle", "candle")
+        self.widget.add_item(VolumeItem, "volume", "volume")
+        self.widget.add_cursor()
+        self.widget.resize(800, 600)
+        self.widget.show()
+        self.widget.update_history(self.bars)
+        self.app.processEvents()
+
+        self.cursor = self.widget._cursor
+        self.calls = []
+
+        item = self.widget._items["candle"]
+        get_info_text = item.get_info_text
+        item.get_info_text = lambda ix: self.calls.append(ix) or get_info_text(ix)
+
+    def move_mouse(self, *xs):
+        view = self.widget.get_plot("candle").getViewBox()
+        y = view.viewRect().center().y()
+
+        for x in xs:
+            pos = view.mapViewToScene(QtCore.QPointF(x, y))
+            self.widget.scene().sigMouseMoved.emit(pos)
+
+        self.app.processEvents()
+
+    def testMouseMoved(self):
+        count = len(self.bars)
+
+        # Mouse moves within one event loop are merged into the last one
+        self.move_mouse(count - 10, count - 5, count - 3)
+        self.assertEqual(self.cursor._x, count - 3)
+        self.assertEqual(self.calls, [count - 3])
+
+        # Info text is cached for each bar
+        self.move_mouse(count - 4)
+        self.move_mouse(count - 3)
+        self.assertEqual(self.calls, [count - 3, count - 4])
+
+        # Info text is dropped after bar is changed
+        bar = copy(self.bars[-3])
+        bar.close_price += 1
+        self.widget.update_history([bar])
+        self.move_mouse(count - 3)
+        self.assertEqual(self.calls, [count - 3, count - 4, count - 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
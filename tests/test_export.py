@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from vnpy.trader.ui import QtGui, QtWidgets
+
+from vnpy_chart import CandleItem, VolumeItem
+from vnpy_chart.export import ChartExporter, export_charts
+from tests.data import get_test_bars
+
+
+def setup_chart(widget):
+    widget.add_plot("candle", hide_x_axis=True)
+    widget.add_plot("volume", maximum_height=200)
+    widget.add_item(CandleItem, "candle", "candle")
+    widget.add_item(VolumeItem, "volume", "volume")
+
+
+def load_bars(symbol):
+    if symbol == "empty":
+        return []
+    return get_test_bars()[:int(symbol)]
+
+
+class TestExport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    def testRender(self):
+        exporter = ChartExporter(setup_chart, 800, 600)
+
+        image = exporter.render(load_bars("200"))
+        self.assertEqual((image.width(), image.height()), (800, 600))
+
+        # Candles are drawn in the middle of image
+        colors = {image.pixel(x, 200) for x in range(0, 800, 2)}
+        self.assertGreater(len(colors), 2)
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "chart.png")
+            self.assertTrue(exporter.save(load_bars("100"), path))
+            self.assertEqual(QtGui.QImage(path).size(), image.size())
+
+    def testExportCharts(self):
+        with tempfile.TemporaryDirectory() as folder:
+            paths = export_charts(["100", "empty", "150"], load_bars, setup_chart, folder, 400, 300, processes=1)
+
+            self.assertEqual(sorted(os.path.basename(path) for path in paths), ["100.png", "150.png"])
+            for path in paths:
+                self.assertEqual(QtGui.QImage(path).width(), 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
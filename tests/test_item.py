@@ -0,0 +1,158 @@
+import os
+import unittest
+from copy import copy
+from datetime import timedelta
+from unittest import mock
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from vnpy.trader.ui import QtCore, QtGui, QtWidgets
+
+from vnpy_chart import LineColor, LineItem
+from vnpy_chart.items import chart_item
+from vnpy_chart.items.chart_item import ChartItem
+from vnpy_chart.manager import BarManager
+from tests.data import get_test_bars
+
+
+class RangeItem(ChartItem):
+    """
+    Record ranges of bars drawn.
+    """
+
+    def __init__(self, manager: BarManager) -> None:
+        super().__init__(manager)
+        self.ranges = []
+
+    def get_y_range(self, min_ix=None, max_ix=None):
+        return self._manager.get_price_range(min_ix, max_ix)
+
+    def get_info_text(self, ix):
+        return ""
+
+    def _draw_range(self, painter, min_ix, max_ix, level):
+        self.ranges.append((min_ix, max_ix, level))
+        painter.drawRect(QtCore.QRectF(min_ix, 0, max_ix - min_ix, 1))
+
+
+@mock.patch.object(chart_item, "TILE_SIZE", 16)
+class TestItem(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    def setUp(self):
+        self.bars = get_test_bars()
+        self.manager = BarManager()
+        self.manager.update_history(self.bars)
+        self.item = RangeItem(self.manager)
+
+    def testDropTiles(self):
+        self.item._get_tile_picture(0, 0)
+        self.item._get_tile_picture(0, 0)
+        self.assertEqual(self.item.ranges, [(0, 16, 0)])
+
+        for level, tile in [(0, 1), (0, 2), (1, 0), (1, 1)]:
+            self.item._get_tile_picture(level, tile)
+
+        # Tiles of all levels overlapping changed bars are dropped
+        self.item._drop_tiles(20, 21)
+        keys = [(level, tile) for level, tile, _ in self.item._tiles]
+        self.assertEqual(keys, [(0, 0), (0, 2), (1, 1)])
+
+        # Tiles are drawn again after style is changed
+        self.item.update_style()
+        self.item._get_tile_picture(0, 0)
+        self.assertEqual(self.item.ranges[-1], (0, 16, 0))
+
+    def testCacheSize(self):
+        pictures = [self.item._get_tile_picture(0, tile) for tile in range(2)]
+        size = sum(picture.size() for picture in pictures)
+
+        # Least recently used tile is dropped when pictures are too large
+        with mock.patch.object(chart_item, "TILE_CACHE_SIZE", size):
+            self.item._get_tile_picture(0, 0)
+            self.item._get_tile_picture(0, 2)
+
+        keys = [(level, tile) for level, tile, _ in self.item._tiles]
+        self.assertEqual(keys, [(0, 0), (0, 2)])
+        self.assertEqual(self.item._tiles_size, sum(picture.size() for picture in self.item._tiles.values()))
+
+    def testHotBar(self):
+        count = len(self.bars)
+        last_tile = (count - 1) // 16
+        self.item._get_tile_picture(0, last_tile)
+
+        # Last bar updated becomes hot bar, which is not drawn into tile
+        bar = copy(self.bars[-1])
+        bar.close_price += 1
+        self.manager.update_bar(bar)
+        self.assertEqual(self.item._hot_ix, count - 1)
+
+        self.item._get_tile_picture(0, last_tile)
+        self.assertEqual(self.item.ranges[-1], (last_tile * 16, count - 1, 0))
+
+        # More ticks of hot bar keep the tile
+        self.item.ranges.clear()
+        bar.close_price += 1
+        self.manager.update_bar(bar)
+        self.item._get_tile_picture(0, last_tile)
+        self.assertEqual(self.item.ranges, [])
+
+        # New bar moves the hot bar, and the old one is drawn into tile
+        new = copy(bar)
+        new.datetime += timedelta(days=1)
+        self.manager.update_bar(new)
+        self.assertEqual(self.item._hot_ix, count)
+
+        self.item._get_tile_picture(0, last_tile)
+        self.assertEqual(self.item.ranges[-1][1], min((last_tile + 1) * 16, count))
+
+        # Hot bar is dropped when bars before it are changed
+        self.manager.update_history(self.bars[:2])
+        self.assertIsNone(self.item._hot_ix)
+
+    def testLinePath(self):
+        item = LineItem(self.manager)
+        self.manager.add_line_series("close", [bar.close_price for bar in self.bars], LineColor.YELLOW)
+
+        spans = []
+        get_line_path = item._get_line_path
+        item._get_line_path = lambda label, level, start, end: (
+            spans.append(end - start) or get_line_path(label, level, start, end)
+        )
+
+        def draw():
+            count = self.manager.get_count()
+            picture = QtGui.QPicture()
+            painter = QtGui.QPainter(picture)
+            item._draw_range(painter, count - 100, count, 0)
+            painter.end()
+
+        draw()
+        self.assertGreater(max(spans), 90)
+
+        # Cached path is extended after new bar, and kept on ticks of it
+        spans.clear()
+        bar = copy(self.bars[-1])
+        bar.datetime += timedelta(days=1)
+        self.manager.update_bar(bar)
+        draw()
+
+        for i in range(3):
+            bar.close_price += 1
+            self.manager.update_bar(bar)
+            self.manager.update_line_series("close", bar.close_price)
+            draw()
+
+        self.assertLessEqual(max(spans), 2)
+
+        # Cached path is built again after bars in it are changed
+        spans.clear()
+        self.manager.update_line_series("close", 0, self.manager.get_count() - 50)
+        draw()
+        self.assertGreater(max(spans), 90)
+
+
+if __name__ == '__main__':
+    unittest.main()
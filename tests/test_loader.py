@@ -0,0 +1,135 @@
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from vnpy.trader.ui import QtWidgets
+from vnpy.trader.object import BarData
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import BarOverview
+
+from vnpy_chart import ChartWidget, CandleItem, HistoryLoader
+
+
+SYMBOL = "SA00"
+EXCHANGE = Exchange.CZCE
+
+
+class FakeDatabase:
+    """
+    Minute bars of 4 trading hours per day.
+    """
+
+    def __init__(self, days: int) -> None:
+        self.bars = []
+        self.calls = []
+
+        for day in range(days):
+            open_dt = datetime(2023, 1, 2, 9) + timedelta(days=day)
+            for minute in range(240):
+                self.bars.append(BarData(
+                    gateway_name="DB",
+                    symbol=SYMBOL,
+                    exchange=EXCHANGE,
+                    datetime=open_dt + timedelta(minutes=minute),
+                    interval=Interval.MINUTE,
+                    open_price=1, high_price=2, low_price=0.5, close_price=1.5, volume=10
+                ))
+
+    def load_bar_data(self, symbol, exchange, interval, start, end):
+        self.calls.append((start, end))
+        return [bar for bar in self.bars if start <= bar.datetime <= end]
+
+    def get_bar_overview(self):
+        return [BarOverview(
+            SYMBOL, EXCHANGE, Interval.MINUTE, len(self.bars),
+            self.bars[0].datetime, self.bars[-1].datetime
+        )]
+
+
+class TestLoader(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    def setUp(self):
+        self.database = FakeDatabase(days=20)
+
+    def create_loader(self, page_size):
+        loader = HistoryLoader(SYMBOL, EXCHANGE, Interval.MINUTE, page_size, self.database.bars[-1].datetime)
+        loader._database = self.database
+        return loader
+
+    def wait_loader(self, loader):
+        while loader.is_loading():
+            self.app.processEvents()
+            time.sleep(0.001)
+        self.app.processEvents()
+
+    def testLoadPage(self):
+        loader = self.create_loader(500)
+        bars = loader.load_latest()
+
+        self.assertEqual([bar.datetime for bar in bars], [bar.datetime for bar in self.database.bars[-500:]])
+
+        # Datetime span is doubled until enough bars are found
+        spans = [end - start for start, end in self.database.calls]
+        self.assertGreater(len(spans), 1)
+        for span, next_span in zip(spans, spans[1:]):
+            self.assertEqual(next_span, span * 2)
+
+    def testFinished(self):
+        loader = self.create_loader(500)
+        pages = []
+        loader.signal_page.connect(pages.append)
+
+        # Bars before the first one are only limited by start of database
+        self.assertTrue(loader.request_older(self.database.bars[100].datetime))
+        self.assertFalse(loader.request_older(self.database.bars[100].datetime))
+        self.wait_loader(loader)
+        self.assertEqual(len(pages[-1]), 100)
+        self.assertFalse(loader.is_finished())
+
+        self.assertTrue(loader.request_older(self.database.bars[0].datetime))
+        self.wait_loader(loader)
+        self.assertEqual(pages[-1], [])
+        self.assertTrue(loader.is_finished())
+        self.assertFalse(loader.request_older(self.database.bars[0].datetime))
+
+        loader.reset()
+        self.assertFalse(loader.is_finished())
+
+    def testCheckPages(self):
+        page_size = 1000
+        widget = ChartWidget(max_bars=page_size)
+        widget.add_plot("candle")
+        widget.add_item(CandleItem, "candle", "candle")
+
+        loader = self.create_loader(page_size)
+        widget.load_history(loader)
+        manager = widget._manager
+        self.assertEqual(manager.get_count(), page_size)
+
+        # Older pages are kept even if there are more than max_bars
+        for i in range(1, 3):
+            widget._check_pages(0)
+            self.wait_loader(loader)
+            self.assertEqual(manager.get_count(), page_size * (i + 1))
+            self.assertEqual(manager.get_datetime(0), self.database.bars[-page_size * (i + 1)].datetime)
+
+        # No page is requested when far from the first bar
+        calls = len(self.database.calls)
+        widget._check_pages(page_size)
+        self.assertFalse(loader.is_loading())
+        self.assertEqual(len(self.database.calls), calls)
+
+        # Pages far left of the view are dropped
+        widget._check_pages(page_size * 3 + 1)
+        self.assertEqual(manager.get_count(), page_size * 2)
+        self.assertEqual(manager.get_datetime(0), self.database.bars[-page_size * 2].datetime)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,309 @@
+import os
+import tempfile
+import unittest
+from copy import copy
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from vnpy_chart import IconEnum, LineColor, mark_icon, mark_line
+from vnpy_chart.manager import BarManager
+from vnpy_chart.storage import write_bar_file
+from tests.data import get_test_bars
+
+
+class TestManager(unittest.TestCase):
+    def setUp(self):
+        self.bars = get_test_bars()
+        self.manager = BarManager()
+        self.manager.update_history(self.bars)
+
+    def testGetBar(self):
+        self.assertEqual(self.manager.get_count(), len(self.bars))
+
+        for ix in [0, 100, len(self.bars) - 1]:
+            bar = self.manager.get_bar(ix)
+            self.assertEqual(bar.datetime, self.bars[ix].datetime)
+            self.assertEqual(bar.close_price, self.bars[ix].close_price)
+            self.assertEqual(bar.volume, self.bars[ix].volume)
+            self.assertEqual(self.manager.get_index(bar.datetime), ix)
+            self.assertEqual(self.manager.get_datetime(ix), bar.datetime)
+
+        self.assertIsNone(self.manager.get_bar(len(self.bars)))
+
+    def testUpdateBar(self):
+        last = copy(self.bars[-1])
+        last.close_price += 1
+        self.manager.update_bar(last)
+        self.assertEqual(self.manager.get_count(), len(self.bars))
+        self.assertEqual(self.manager.get_bar(len(self.bars) - 1).close_price, last.close_price)
+
+        new = copy(self.bars[-1])
+        new.datetime += timedelta(days=1)
+        self.manager.update_bar(new)
+        self.assertEqual(self.manager.get_count(), len(self.bars) + 1)
+        self.assertEqual(self.manager.get_index(new.datetime), len(self.bars))
+
+    def testRange(self):
+        bars = self.bars[10:51]
+        self.assertEqual(
+            self.manager.get_price_range(10, 50),
+            (min(bar.low_price for bar in bars), max(bar.high_price for bar in bars))
+        )
+        self.assertEqual(
+            self.manager.get_volume_range(10, 50),
+            (0, max(bar.volume for bar in bars))
+        )
+        self.assertEqual(
+            self.manager.get_price_range(),
+            (min(bar.low_price for bar in self.bars), max(bar.high_price for bar in self.bars))
+        )
+
+    def testRangeIndex(self):
+        bars = self.bars * 3
+        for ix, bar in enumerate(bars):
+            bar = copy(bar)
+            bar.datetime = bars[0].datetime + timedelta(days=ix)
+            bars[ix] = bar
+
+        manager = BarManager()
+        manager.update_history(bars)
+
+        for min_ix, max_ix in [(0, 0), (0, 63), (1, 64), (63, 128), (5, 600), (130, 725), (0, 725)]:
+            high = max(bar.high_price for bar in bars[min_ix:max_ix + 1])
+            low = min(bar.low_price for bar in bars[min_ix:max_ix + 1])
+            self.assertEqual(manager.get_price_range(min_ix, max_ix), (low, high))
+
+        last = copy(bars[-1])
+        last.high_price = 10000
+        last.volume = 1e10
+        manager.update_bar(last)
+        self.assertEqual(manager.get_price_range(100, len(bars) - 1)[1], 10000)
+        self.assertEqual(manager.get_volume_range(100, len(bars))[1], 1e10)
+
+    def testMerge(self):
+        manager = BarManager()
+        self.assertEqual(manager.update_history(self.bars[100:150]), (0, 50, 0))
+        self.assertEqual(manager.update_history(self.bars[150:200]), (50, 100, 0))
+        self.assertEqual(manager.update_history(self.bars[50:100]), (0, 50, 50))
+        self.assertEqual(manager.update_history(self.bars[195:220]), (145, 170, 0))
+
+        manager.update_history(self.bars[:20] + self.bars[30:50])
+        self.assertEqual(manager.update_history(self.bars[15:35]), (15, 220, 0))
+        self.assertEqual(manager.update_history(self.bars[::-1]), (0, len(self.bars), 0))
+
+        self.assertEqual(manager.get_count(), len(self.bars))
+        for ix, bar in enumerate(self.bars):
+            self.assertEqual(manager.get_index(bar.datetime), ix)
+            self.assertEqual(manager.get_bar(ix).close_price, bar.close_price)
+
+    def testDatetimeLookup(self):
+        first = self.bars[0].datetime
+        last = self.bars[-1].datetime
+
+        self.assertIsNone(self.manager.get_index(first - timedelta(days=1)))
+        self.assertIsNone(self.manager.get_nearest_index(first - timedelta(days=1)))
+        self.assertEqual(self.manager.get_nearest_index(first + timedelta(hours=1)), 0)
+        self.assertEqual(self.manager.get_nearest_index(last + timedelta(days=10)), len(self.bars) - 1)
+
+        self.assertEqual(
+            self.manager.get_index_range(self.bars[10].datetime, self.bars[20].datetime),
+            (10, 20)
+        )
+        self.assertEqual(
+            self.manager.get_index_range(first - timedelta(days=10), first + timedelta(hours=1)),
+            (0, 0)
+        )
+        self.assertIsNone(self.manager.get_index_range(last + timedelta(hours=1), last + timedelta(days=1)))
+
+        dts = [self.bars[5].datetime, first - timedelta(days=1), self.bars[7].datetime + timedelta(hours=1)]
+        self.assertEqual(self.manager.get_indexes(dts).tolist(), [5, -1, -1])
+        self.assertEqual(self.manager.get_indexes(dts, nearest=True).tolist(), [5, -1, 7])
+
+    def testRetention(self):
+        manager = BarManager(max_bars=100)
+        manager.update_history(self.bars[:90])
+
+        start, end, shift = manager.update_history(self.bars[90:120])
+        self.assertEqual(shift, -32)
+        self.assertEqual((start, end), (58, 88))
+        self.assertEqual(manager.get_count(), 88)
+        self.assertEqual(manager.get_bar(0).datetime, self.bars[32].datetime)
+
+        for bar in self.bars[120:]:
+            manager.update_bar(bar)
+            self.assertLessEqual(manager.get_count(), 100)
+
+        count = manager.get_count()
+        self.assertEqual(manager.get_bar(count - 1).datetime, self.bars[-1].datetime)
+        self.assertEqual(manager.get_index(self.bars[-count].datetime), 0)
+        self.assertEqual(
+            manager.get_price_range(),
+            (min(bar.low_price for bar in self.bars[-count:]), max(bar.high_price for bar in self.bars[-count:]))
+        )
+
+    def testListener(self):
+        manager = BarManager(max_bars=100)
+        changes = []
+        manager.add_listener(lambda *change: changes.append(change))
+
+        manager.update_history(self.bars[:90])
+        manager.update_history(self.bars[90:120])
+        manager.update_bar(self.bars[119])
+        manager.add_line_series("ma", [1.0, 2.0], LineColor.YELLOW)
+        manager.update_line_series("ma", 3.0)
+        manager.evict(8)
+        self.assertEqual(changes, [
+            (0, 90, 0),
+            (58, 88, -32),
+            (87, 88, 0),
+            (0, 88, 0),
+            (87, 88, 0),
+            (0, 0, -8),
+        ])
+
+    def testFirstBar(self):
+        # Timezone of bars is kept when the first bar is added by update_bar
+        manager = BarManager()
+        manager.update_bar(self.bars[0])
+        manager.update_bar(self.bars[1])
+
+        self.assertIsNotNone(self.bars[0].datetime.tzinfo)
+        self.assertEqual(manager.get_bar(0).datetime, self.bars[0].datetime)
+        self.assertEqual(manager.get_datetime(1), self.bars[1].datetime)
+        self.assertEqual(manager.get_tzinfo(), self.bars[0].datetime.tzinfo)
+
+    def testPyramid(self):
+        first, bars = self.manager.get_lod_bars(2, 10, 50)
+        self.assertEqual(first, 2)
+        self.assertEqual(len(bars["open_price"]), 11)
+
+        merged = self.bars[8:12]
+        self.assertEqual(bars["open_price"][0], merged[0].open_price)
+        self.assertEqual(bars["close_price"][0], merged[-1].close_price)
+        self.assertEqual(bars["high_price"][0], max(bar.high_price for bar in merged))
+        self.assertEqual(bars["low_price"][0], min(bar.low_price for bar in merged))
+        self.assertEqual(bars["volume"][0], sum(bar.volume for bar in merged))
+        self.assertEqual(bars["max_volume"][0], max(bar.volume for bar in merged))
+
+        # Merged bar is updated with the last bar
+        ix = len(self.bars) - 1
+        last = copy(self.bars[-1])
+        last.high_price += 100
+        last.volume += 10 ** 9
+        self.manager.update_bar(last)
+
+        first, bars = self.manager.get_lod_bars(2, ix, ix)
+        merged = self.bars[first * 4:-1] + [last]
+        self.assertEqual(bars["high_price"][0], last.high_price)
+        self.assertEqual(bars["volume"][0], sum(bar.volume for bar in merged))
+        self.assertEqual(bars["max_volume"][0], last.volume)
+
+    def testLineSeries(self):
+        count = len(self.bars)
+        self.manager.add_line_series("ma", np.arange(10, dtype=float), LineColor.YELLOW)
+
+        values = self.manager.get_array("ma")
+        self.assertTrue(np.isnan(values[:-10]).all())
+        self.assertEqual(values[-1], 9)
+
+        self.manager.update_line_series("ma", 100)
+        self.assertEqual(self.manager.get_array("ma")[-1], 100)
+
+        # Line value is empty for new bar and kept when bar is updated
+        new = copy(self.bars[-1])
+        new.datetime += timedelta(days=1)
+        self.manager.update_bar(new)
+        self.assertTrue(np.isnan(self.manager.get_array("ma")[-1]))
+
+        self.manager.update_history(self.bars[-5:])
+        self.assertEqual(self.manager.get_array("ma")[count - 1], 100)
+
+        # Lines marked in extra are converted into line series
+        bar = copy(self.bars[10])
+        bar.extra = None
+        mark_line(bar, ("ma", 1.5, LineColor.YELLOW))
+        self.manager.update_history([bar])
+        self.assertEqual(self.manager.get_array("ma")[10], 1.5)
+        self.assertIsNone(self.manager.get_bar(10).extra)
+
+    def testExtra(self):
+        bars = [copy(self.bars[ix]) for ix in (5, 50, 100)]
+        for bar in bars:
+            bar.extra = {"signal": bar.close_price}
+        self.manager.update_history(bars)
+
+        self.assertEqual(self.manager.get_extra(50), {"signal": bars[1].close_price})
+        self.assertIsNone(self.manager.get_extra(51))
+
+        self.manager.evict(10)
+        self.assertEqual(self.manager.get_extra(40), {"signal": bars[1].close_price})
+        self.assertEqual(self.manager.get_bar(90).extra, {"signal": bars[2].close_price})
+
+    def testIcons(self):
+        dts = [self.bars[ix].datetime for ix in (30, 10, 20)]
+        self.manager.add_icons(IconEnum.SMILEY_FACE, dts, [3.0, 1.0, 2.0], tag="fill")
+
+        # Icons marked in extra are replaced when bar is updated again
+        bar = copy(self.bars[15])
+        mark_icon(bar, (IconEnum.SMILEY_FACE, 1.5))
+        self.manager.update_history([bar])
+        bar.extra = None
+        mark_icon(bar, (IconEnum.SMILEY_FACE, 1.6))
+        self.manager.update_bar(bar)
+
+        ixs, values, tags = self.manager.get_icons(10, 25)[IconEnum.SMILEY_FACE]
+        self.assertEqual(ixs.tolist(), [10, 15, 20])
+        self.assertEqual(values.tolist(), [1.0, 1.6, 2.0])
+        self.assertEqual(tags.tolist(), ["fill", "extra", "fill"])
+        self.assertIsNone(self.manager.get_bar(15).extra)
+
+        self.manager.remove_icons("fill")
+        ixs, values, tags = self.manager.get_icons()[IconEnum.SMILEY_FACE]
+        self.assertEqual(ixs.tolist(), [15])
+
+    def testAttachFile(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "bars.dat")
+            write_bar_file(path, self.bars, reserve=10)
+
+            manager = BarManager()
+            manager.attach_file(path)
+
+            self.assertEqual(manager.get_count(), len(self.bars))
+            self.assertEqual(manager.get_price_range(), self.manager.get_price_range())
+            self.assertEqual(manager.get_price_range(30, 150), self.manager.get_price_range(30, 150))
+            for ix in [0, 100, len(self.bars) - 1]:
+                self.assertEqual(manager.get_bar(ix).datetime, self.bars[ix].datetime)
+                self.assertEqual(manager.get_bar(ix).close_price, self.bars[ix].close_price)
+
+            new = copy(self.bars[-1])
+            new.datetime += timedelta(days=1)
+            new.high_price = 10000
+            manager.update_bar(new)
+            self.assertEqual(manager.get_count(), len(self.bars) + 1)
+            self.assertEqual(manager.get_price_range()[1], 10000)
+
+            # Bars updated are never written into file
+            manager.attach_file(path)
+            self.assertEqual(manager.get_count(), len(self.bars))
+
+            write_bar_file(path, pd.DataFrame(self.bars))
+            manager.attach_file(path)
+            self.assertEqual(manager.get_bar(10).datetime, self.bars[10].datetime)
+
+            # Bars are sorted, and the last one wins for the same datetime
+            dup = copy(self.bars[10])
+            dup.close_price += 1
+            write_bar_file(path, self.bars[::-1] + [dup])
+            manager.attach_file(path)
+            self.assertEqual(manager.get_count(), len(self.bars))
+            self.assertEqual(manager.get_index(self.bars[10].datetime), 10)
+            self.assertEqual(manager.get_bar(10).close_price, dup.close_price)
+            self.assertEqual(manager.get_price_range(30, 150), self.manager.get_price_range(30, 150))
+            del manager
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import unittest
+from copy import copy
+from datetime import timedelta
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from vnpy.trader.ui import QtWidgets
+
+from vnpy_chart import ChartWidget, CandleItem, IconItem, LineItem, VolumeItem
+from tests.data import get_test_bars
+
+
+class TestPlot(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    def setUp(self):
+        self.bars = get_test_bars()
+
+        self.widget = ChartWidget()
+        self.widget.add_plot("candle", hide_x_axis=True)
+        self.widget.add_plot("volume", maximum_height=200)
+        self.widget.add_item(CandleItem, "candle", "candle")
+        self.widget.add_item(LineItem, "line", "candle")
+        self.widget.add_item(IconItem, "icon", "candle")
+        self.widget.add_item(VolumeItem, "volume", "volume")
+        self.widget.update_history(self.bars[:-10])
+
+        self.manager = self.widget._manager
+
+    def get_limits(self, plot_name):
+        view = self.widget.get_plot(plot_name).getViewBox()
+        return tuple(view.state["limits"]["yLimits"])
+
+    def assertLimits(self):
+        self.assertEqual(self.get_limits("candle"), self.manager.get_price_range())
+        self.assertEqual(self.get_limits("volume"), self.manager.get_volume_range())
+
+    def testLimits(self):
+        self.assertLimits()
+
+        # New bars and ticks of the last bar
+        for bar in self.bars[-10:]:
+            bar = copy(bar)
+            self.widget.update_bar(bar)
+            self.assertLimits()
+
+            bar.high_price *= 1.5
+            bar.volume *= 3
+            self.widget.update_bar(bar)
+            self.assertLimits()
+
+        # Settled bars lowered by overlapping history
+        bars = [copy(bar) for bar in self.bars[-20:]]
+        for bar in bars:
+            bar.high_price = bar.open_price
+            bar.volume = 1
+        self.widget.update_history(bars)
+        self.assertLimits()
+
+        # History added in front moves settled bars
+        bar = copy(self.bars[0])
+        bar.datetime -= timedelta(days=1)
+        bar.low_price = 1
+        self.widget.update_history([bar])
+        self.assertEqual(self.get_limits("candle")[0], 1)
+        self.assertLimits()
+
+        # Settled ranges are dropped after item is added
+        self.assertGreater(self.widget._settled_count, 0)
+        self.widget.add_item(LineItem, "line2", "volume")
+        self.assertEqual(self.widget._settled_count, 0)
+
+    def testRangeQuery(self):
+        calls = []
+        get_price_range = self.manager.get_price_range
+        self.manager.get_price_range = lambda *args: calls.append(args) or get_price_range(*args)
+
+        # Items with the same Y_RANGE_KEY in one plot are queried once
+        ranges = self.widget._get_plot_ranges(0, 50)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(ranges[self.widget.get_plot("candle")], get_price_range(0, 50))
+
+    def testAutoscale(self):
+        self.widget.show()
+        self.app.processEvents()
+
+        stats = self.widget.get_autoscale_stats()
+
+        # Range signals of all linked plots in one event loop are merged
+        for plot in self.widget.get_all_plots():
+            plot.getViewBox().setXRange(10, 100, padding=0)
+            plot.getViewBox().sigXRangeChanged.emit(plot.getViewBox(), (10, 100))
+        self.app.processEvents()
+
+        new_stats = self.widget.get_autoscale_stats()
+        self.assertGreaterEqual(new_stats["requested"] - stats["requested"], 2)
+        self.assertEqual(new_stats["passes"] - stats["passes"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
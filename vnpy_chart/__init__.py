@@ -1,4 +1,7 @@
 from .widget import ChartWidget
+from .loader import HistoryLoader
+from .storage import BarFile, write_bar_file
+from .export import ChartExporter, export_charts
 from .items import (
     CandleItem,
     VolumeItem,
@@ -0,0 +1,167 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class AnnotationStore:
+    """
+    Sparse storage of icons marked on bars.
+
+    For each icon, datetimes in nanoseconds are kept in a sorted array, along
+    with arrays of y values and tags. Tags are saved as integer codes, so that
+    all icons of one tag can be removed at once.
+    """
+
+    def __init__(self) -> None:
+        """"""
+        self._datetimes: Dict[object, np.ndarray] = {}
+        self._values: Dict[object, np.ndarray] = {}
+        self._tags: Dict[object, np.ndarray] = {}
+
+        self._tag_codes: Dict[str, int] = {}
+        self._tag_names: List[str] = []
+
+    def add(self, icon: object, datetimes: np.ndarray, values: np.ndarray, tag: str = "") -> None:
+        """
+        Add icons at datetimes in nanoseconds with y values.
+        """
+        datetimes = np.asarray(datetimes, dtype=np.int64)
+        values = np.broadcast_to(np.asarray(values, dtype=np.float64), datetimes.shape)
+        if not len(datetimes):
+            return
+
+        code: int = self._get_tag_code(tag)
+        tags: np.ndarray = np.full(len(datetimes), code, dtype=np.int32)
+
+        if icon not in self._datetimes:
+            order: np.ndarray = np.argsort(datetimes, kind="stable")
+            self._datetimes[icon] = datetimes[order]
+            self._values[icon] = values[order]
+            self._tags[icon] = tags
+            return
+
+        old_datetimes: np.ndarray = self._datetimes[icon]
+
+        # Newer than all existing icons, which is the most common case
+        if (
+            (not len(old_datetimes) or datetimes[0] >= old_datetimes[-1])
+            and (len(datetimes) == 1 or (datetimes[1:] >= datetimes[:-1]).all())
+        ):
+            self._datetimes[icon] = np.concatenate([old_datetimes, datetimes])
+            self._values[icon] = np.concatenate([self._values[icon], values])
+            self._tags[icon] = np.concatenate([self._tags[icon], tags])
+            return
+
+        merged_datetimes: np.ndarray = np.concatenate([old_datetimes, datetimes])
+        order: np.ndarray = np.argsort(merged_datetimes, kind="stable")
+
+        self._datetimes[icon] = merged_datetimes[order]
+        self._values[icon] = np.concatenate([self._values[icon], values])[order]
+        self._tags[icon] = np.concatenate([self._tags[icon], tags])[order]
+
+    def remove(self, tag: str, icon: object = None) -> None:
+        """
+        Remove all icons of tag, only of given icon if specified.
+        """
+        code: int = self._tag_codes.get(tag, None)
+        if code is None:
+            return
+
+        icons: list = [icon] if icon is not None else list(self._datetimes)
+        for icon in icons:
+            if icon in self._tags:
+                self._filter(icon, self._tags[icon] != code)
+
+    def remove_at(self, tag: str, datetimes: np.ndarray) -> None:
+        """
+        Remove icons of tag at given sorted datetimes.
+        """
+        code: int = self._tag_codes.get(tag, None)
+        if code is None or not len(datetimes):
+            return
+
+        for icon, old_datetimes in list(self._datetimes.items()):
+            # Only check icons within datetime range of removal
+            start: int = int(np.searchsorted(old_datetimes, datetimes[0], side="left"))
+            end: int = int(np.searchsorted(old_datetimes, datetimes[-1], side="right"))
+            if start == end:
+                continue
+
+            keep: np.ndarray = np.ones(len(old_datetimes), dtype=bool)
+            keep[start:end] = ~(
+                np.isin(old_datetimes[start:end], datetimes)
+                & (self._tags[icon][start:end] == code)
+            )
+            self._filter(icon, keep)
+
+    def remove_before(self, dt: int) -> None:
+        """
+        Remove all icons before datetime in nanoseconds.
+        """
+        for icon, datetimes in list(self._datetimes.items()):
+            start: int = int(np.searchsorted(datetimes, dt, side="left"))
+            if start:
+                self._datetimes[icon] = datetimes[start:]
+                self._values[icon] = self._values[icon][start:]
+                self._tags[icon] = self._tags[icon][start:]
+
+    def query(self, start: int, end: int) -> Dict[object, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Get (datetimes, values, tags) of each icon within datetime range [start, end].
+        """
+        result: Dict[object, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+        for icon, datetimes in self._datetimes.items():
+            lo: int = int(np.searchsorted(datetimes, start, side="left"))
+            hi: int = int(np.searchsorted(datetimes, end, side="right"))
+
+            if hi > lo:
+                result[icon] = (
+                    datetimes[lo:hi],
+                    self._values[icon][lo:hi],
+                    self._tags[icon][lo:hi]
+                )
+
+        return result
+
+    def get_tag_names(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Get array of tag names with tag codes returned by query.
+        """
+        return np.array(self._tag_names, dtype=object)[codes]
+
+    def get_count(self) -> int:
+        """
+        Get total number of icons.
+        """
+        return sum(len(datetimes) for datetimes in self._datetimes.values())
+
+    def _get_tag_code(self, tag: str) -> int:
+        """
+        Get code of tag, add new code if not exists.
+        """
+        code: int = self._tag_codes.get(tag, None)
+        if code is None:
+            code = len(self._tag_names)
+            self._tag_codes[tag] = code
+            self._tag_names.append(tag)
+        return code
+
+    def _filter(self, icon: object, keep: np.ndarray) -> None:
+        """
+        Keep icons selected by mask only.
+        """
+        if keep.all():
+            return
+
+        self._datetimes[icon] = self._datetimes[icon][keep]
+        self._values[icon] = self._values[icon][keep]
+        self._tags[icon] = self._tags[icon][keep]
+
+    def clear(self) -> None:
+        """
+        Remove all icons.
+        """
+        self._datetimes.clear()
+        self._values.clear()
+        self._tags.clear()
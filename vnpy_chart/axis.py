@@ -1,24 +1,303 @@
-from datetime import datetime
-from typing import List
+from collections import OrderedDict
+from typing import Dict, List, Tuple
 
+import numpy as np
 import pyqtgraph as pg
 
 from .manager import BarManager
-from .base import AXIS_WIDTH, NORMAL_FONT, QtGui
+from .base import AXIS_WIDTH, NORMAL_FONT, QtGui, DAY_NS, to_int, to_local_ns
 
 
-class DatetimeAxis(pg.AxisItem):
-    """"""
+# Bars after a gap longer than this start a new session
+SESSION_GAP = 30 * 60 * 10 ** 9
+
+# Format of labels at boundaries of each level
+LEVEL_FORMATS = {
+    "session": "%Y-%m-%d\n%H:%M",
+    "day": "%Y-%m-%d",
+    "month": "%Y-%m",
+    "year": "%Y",
+}
+
+DATE_FORMAT = "%Y-%m-%d"
+DATETIME_FORMAT = "%Y-%m-%d\n%H:%M:%S"
+
+# Position of fields in ISO string of numpy datetime64
+ISO_FIELDS = {
+    "%Y": slice(0, 4),
+    "%m": slice(5, 7),
+    "%d": slice(8, 10),
+    "%H": slice(11, 13),
+    "%M": slice(14, 16),
+    "%S": slice(17, 19),
+}
+
+
+def format_ns(local_ns: np.ndarray, fmt: str) -> List[str]:
+    """
+    Format int64 array of local nanoseconds, only fields in ISO_FIELDS are
+    supported in fmt.
+    """
+    texts: np.ndarray = np.datetime_as_string(local_ns.view("datetime64[ns]"), unit="s")
+
+    results: List[str] = []
+    for text in texts.tolist():
+        result: str = fmt
+        for field, position in ISO_FIELDS.items():
+            result = result.replace(field, text[position])
+        results.append(result)
+    return results
+
+
+class DatetimeTicks:
+    """
+    Indexes of bars starting new session, day, month and year, and cache of
+    tick labels, shared by datetime axes of all plots.
+
+    Boundaries are computed only for a range of bars growing with the views
+    asking for them, which is cut at changed bars notified by manager.
+    """
 
-    def __init__(self, manager: BarManager, *args, **kwargs) -> None:
+    # Max number of labels cached for (index, format)
+    LABEL_CACHE_SIZE = 1024
+
+    def __init__(self, manager: BarManager) -> None:
         """"""
+        self._manager: BarManager = manager
+
+        self._boundaries: Dict[str, np.ndarray] = {}
+
+        # Boundaries within index range [start, end) are computed
+        self._start: int = 0
+        self._end: int = 0
+        self._clear_boundaries()
+
+        self._labels: OrderedDict[Tuple[int, str], str] = OrderedDict()
+
+        self._manager.add_listener(self.update_range)
+
+    def update_range(self, start: int, end: int, shift: int = 0) -> None:
+        """
+        Update bars changed within index range [start, end).
+        """
+        if shift:
+            for level, boundaries in self._boundaries.items():
+                boundaries = boundaries + shift
+                self._boundaries[level] = boundaries[boundaries > 0]
+
+            self._start = max(self._start + shift, 1)
+            self._end = max(self._end + shift, self._start)
+
+            self._labels.clear()
+        elif self._labels:
+            for key in [key for key in self._labels if start <= key[0] < end]:
+                self._labels.pop(key)
+
+        # Boundary at index ix depends on bar ix - 1 and bar ix, so that
+        # boundaries within [start, end] are computed again
+        if start >= end or start >= self._end or end + 1 <= self._start:
+            return
+
+        if start <= self._start:
+            self._start = end + 1
+        else:
+            self._end = start
+
+        if self._start >= self._end:
+            self._clear_boundaries()
+            return
+
+        for level, boundaries in self._boundaries.items():
+            self._boundaries[level] = boundaries[(boundaries >= self._start) & (boundaries < self._end)]
+
+    def _clear_boundaries(self) -> None:
+        """"""
+        self._start = 0
+        self._end = 0
+        self._boundaries = {level: np.empty(0, dtype=np.int64) for level in LEVEL_FORMATS}
+
+    def get_boundaries(self, level: str, min_ix: float, max_ix: float) -> np.ndarray:
+        """
+        Get sorted indexes of bars starting a new period of level within
+        index range [min_ix, max_ix].
+        """
+        start: int = max(int(np.ceil(min_ix)), 1)
+        end: int = min(int(max_ix) + 1, self._manager.get_count())
+        if start >= end:
+            return self._boundaries[level][:0]
+
+        # Range is at least doubled, so that panning computes fewer times
+        if self._start == self._end:
+            self._start, self._end = start, start
+            self._extend(start, end)
+        else:
+            size: int = self._end - self._start
+            if start < self._start:
+                self._extend(max(min(start, self._start - size), 1), self._start)
+            if end > self._end:
+                self._extend(self._end, min(max(end, self._end + size), self._manager.get_count()))
+
+        boundaries: np.ndarray = self._boundaries[level]
+        left: int = np.searchsorted(boundaries, start)
+        right: int = np.searchsorted(boundaries, end)
+        return boundaries[left:right]
+
+    def _extend(self, start: int, end: int) -> None:
+        """
+        Compute boundaries within index range [start, end) next to the range
+        already computed.
+        """
+        ns: np.ndarray = self._manager.get_array("datetime", start - 1, end - 1)
+        local_ns: np.ndarray = to_local_ns(ns, self._manager.get_tzinfo())
+
+        days: np.ndarray = local_ns // DAY_NS
+        positions: Dict[str, np.ndarray] = {
+            "session": np.flatnonzero(np.diff(ns) > SESSION_GAP),
+            "day": np.flatnonzero(days[1:] != days[:-1]),
+        }
+
+        # New month or year can only start with a new day
+        day_starts: np.ndarray = local_ns[positions["day"] + 1].view("datetime64[ns]")
+        last_day: np.ndarray = local_ns[positions["day"]].view("datetime64[ns]")
+        for level, unit in (("month", "datetime64[M]"), ("year", "datetime64[Y]")):
+            changed: np.ndarray = day_starts.astype(unit) != last_day.astype(unit)
+            positions[level] = positions["day"][changed]
+
+        for level, boundaries in self._boundaries.items():
+            if start < self._start:
+                self._boundaries[level] = np.concatenate([positions[level] + start, boundaries])
+            else:
+                self._boundaries[level] = np.concatenate([boundaries, positions[level] + start])
+
+        self._start = min(self._start, start)
+        self._end = max(self._end, end)
+
+    def get_periods(self, level: str, ixs: np.ndarray) -> np.ndarray:
+        """
+        Get numbers of days, months or years since epoch of bars at indexes.
+        """
+        ns: np.ndarray = self._manager.get_array("datetime")[ixs]
+        local_ns: np.ndarray = to_local_ns(ns, self._manager.get_tzinfo())
+
+        if level == "day":
+            return local_ns // DAY_NS
+
+        unit: str = "datetime64[M]" if level == "month" else "datetime64[Y]"
+        return local_ns.view("datetime64[ns]").astype(unit).view(np.int64)
+
+    def get_labels(self, ixs: List[int], fmt: str = None) -> List[str]:
+        """
+        Get labels of bars at indexes formatted with fmt.
+
+        Without fmt, time is shown only if hour is not 0.
+        Labels not cached are formatted together.
+        """
+        count: int = self._manager.get_count()
+        missing: List[int] = sorted({
+            ix for ix in ixs if 0 <= ix < count and (ix, fmt) not in self._labels
+        })
+
+        if missing:
+            ns: np.ndarray = self._manager.get_array("datetime")[missing]
+            local_ns: np.ndarray = to_local_ns(ns, self._manager.get_tzinfo())
+
+            if fmt:
+                texts: List[str] = format_ns(local_ns, fmt)
+            else:
+                hours: np.ndarray = local_ns // (DAY_NS // 24) % 24
+                dates: List[str] = format_ns(local_ns, DATE_FORMAT)
+                datetimes: List[str] = format_ns(local_ns, DATETIME_FORMAT)
+                texts: List[str] = [
+                    date_time if hour else date
+                    for hour, date, date_time in zip(hours.tolist(), dates, datetimes)
+                ]
+
+            for ix, text in zip(missing, texts):
+                self._labels[(ix, fmt)] = text
+
+            while len(self._labels) > self.LABEL_CACHE_SIZE:
+                self._labels.popitem(last=False)
+
+        labels: List[str] = []
+        for ix in ixs:
+            key: Tuple[int, str] = (ix, fmt)
+            label: str = self._labels.get(key, "")
+            if label:
+                self._labels.move_to_end(key)
+            labels.append(label)
+        return labels
+
+
+class DatetimeAxis(pg.AxisItem):
+    """
+    Ticks are put at boundaries of sessions, days, months or years, whichever
+    level has the most ticks without being closer than TICK_SPACING pixels.
+    If it has fewer than MIN_TICK_COUNT ticks, boundaries of a finer level are
+    thinned out instead. Evenly spaced indexes are used when there are fewer
+    than 2 boundaries.
+    """
+
+    # Min distance in pixels between ticks at boundaries
+    TICK_SPACING = 120
+    MIN_TICK_COUNT = 3
+
+    def __init__(self, manager: BarManager, *args, ticks: DatetimeTicks = None, **kwargs) -> None:
+        """
+        Axes of different plots can share ticks of the same manager.
+        """
         super().__init__(*args, **kwargs)
 
         self._manager: BarManager = manager
+        self._ticks: DatetimeTicks = ticks or DatetimeTicks(manager)
+
+        # Format of labels at ticks, None for evenly spaced ticks
+        self._tick_format: str = None
 
         self.setPen(width=AXIS_WIDTH)
         self.tickFont: QtGui.QFont = NORMAL_FONT
 
+        # Reserve two lines of text, so that labels are shown at the first
+        # paint and axis height is not changed with labels
+        line_height: int = QtGui.QFontMetrics(NORMAL_FONT).lineSpacing()
+        self.setStyle(tickTextHeight=line_height * 2, autoExpandTextSpace=False)
+
+    def tickValues(self, minVal: float, maxVal: float, size: float) -> list:
+        """
+        Snap ticks to boundaries of bars.
+        """
+        min_ix, max_ix = sorted((minVal, maxVal))
+        max_count: int = max(int(size / self.TICK_SPACING), 2)
+
+        best: Tuple[str, np.ndarray] = None
+        dense: Tuple[str, np.ndarray] = None
+
+        for level in LEVEL_FORMATS:
+            boundaries: np.ndarray = self._ticks.get_boundaries(level, min_ix, max_ix)
+
+            if len(boundaries) <= max_count:
+                if not best or len(boundaries) > len(best[1]):
+                    best = (level, boundaries)
+            elif level != "session":
+                dense = (level, boundaries)
+
+        # Coarsest level with too many boundaries is thinned out by keeping
+        # periods with number divisible by step, so that ticks are not
+        # changed while scrolling
+        if dense and (not best or len(best[1]) < self.MIN_TICK_COUNT):
+            level, boundaries = dense
+            step: int = -(-len(boundaries) // max_count)
+            periods: np.ndarray = self._ticks.get_periods(level, boundaries)
+            best = (level, boundaries[periods % step == 0])
+
+        level, values = best
+        if len(values) < 2:
+            self._tick_format = None
+            return super().tickValues(minVal, maxVal, size)
+
+        self._tick_format = LEVEL_FORMATS[level]
+        spacing: float = max((values[-1] - values[0]) / (len(values) - 1), 1)
+        return [(spacing, values.astype(float).tolist())]
+
     def tickStrings(self, values: List[int], scale: float, spacing: int) -> list:
         """
         Convert original index to datetime string.
@@ -27,18 +306,4 @@ class DatetimeAxis(pg.AxisItem):
         if spacing < 1:
             return ["" for i in values]
 
-        strings: list = []
-
-        for ix in values:
-            dt: datetime = self._manager.get_datetime(ix)
-
-            if not dt:
-                s: str = ""
-            elif dt.hour:
-                s: str = dt.strftime("%Y-%m-%d\n%H:%M:%S")
-            else:
-                s: str = dt.strftime("%Y-%m-%d")
-
-            strings.append(s)
-
-        return strings
+        return self._ticks.get_labels([to_int(value) for value in values], self._tick_format)
@@ -0,0 +1,78 @@
+from threading import Lock
+from typing import Dict, List
+
+from vnpy.trader.object import BarData
+
+from .base import to_ns
+
+
+class BarQueue:
+    """
+    Thread-safe queue of bar updates waiting to be shown.
+
+    Only the latest update of each bar is kept, earlier updates of the same
+    bar are merged. If there are more than max_size bars pending, the oldest
+    pending bars are dropped.
+    """
+
+    def __init__(self, max_size: int = 10000) -> None:
+        """"""
+        self.max_size: int = max_size
+
+        self._lock: Lock = Lock()
+        self._bars: Dict[int, BarData] = {}
+
+        self._pushed_count: int = 0
+        self._merged_count: int = 0
+        self._dropped_count: int = 0
+
+    def push(self, bar: BarData) -> bool:
+        """
+        Add bar update from any thread.
+
+        Return True if the queue was empty before, so that the consumer knows
+        a drain needs to be scheduled.
+        """
+        dt: int = to_ns(bar.datetime)
+
+        with self._lock:
+            empty: bool = not self._bars
+            self._pushed_count += 1
+
+            if dt in self._bars:
+                self._merged_count += 1
+            elif len(self._bars) >= self.max_size:
+                self._bars.pop(next(iter(self._bars)))
+                self._dropped_count += 1
+
+            self._bars[dt] = bar
+
+        return empty
+
+    def pop_all(self) -> List[BarData]:
+        """
+        Take all pending bar updates out of queue.
+        """
+        with self._lock:
+            bars: Dict[int, BarData] = self._bars
+            self._bars = {}
+
+        return list(bars.values())
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get number of updates pushed, merged into a later update and dropped.
+        """
+        with self._lock:
+            return {
+                "pushed": self._pushed_count,
+                "merged": self._merged_count,
+                "dropped": self._dropped_count,
+            }
+
+    def clear(self) -> None:
+        """
+        Drop all pending bar updates.
+        """
+        with self._lock:
+            self._bars.clear()
@@ -1,3 +1,7 @@
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Sequence
+
+import numpy as np
 from vnpy.trader.ui import QtGui
 
 
@@ -15,7 +19,87 @@ BAR_WIDTH = 0.3
 AXIS_WIDTH = 0.8
 NORMAL_FONT = QtGui.QFont("Arial", 9)
 
+EPOCH = datetime(1970, 1, 1)
+EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+DAY_NS = 24 * 3600 * 10 ** 9
+
 
 def to_int(value: float) -> int:
     """"""
     return int(round(value, 0))
+
+
+def to_ns(dt: datetime) -> int:
+    """
+    Convert datetime into nanoseconds since epoch.
+
+    Naive datetime is counted from naive epoch, so that it can be restored as it is.
+    """
+    if dt.tzinfo:
+        delta: timedelta = dt - EPOCH_UTC
+    else:
+        delta: timedelta = dt - EPOCH
+    return (delta // MICROSECOND) * 1000
+
+
+def from_ns(ns: int, tz: tzinfo = None) -> datetime:
+    """
+    Convert nanoseconds since epoch back into datetime.
+    """
+    delta: timedelta = timedelta(microseconds=ns // 1000)
+    if tz:
+        return (EPOCH_UTC + delta).astimezone(tz)
+    else:
+        return EPOCH + delta
+
+
+def to_local_ns(ns: np.ndarray, tz: tzinfo = None) -> np.ndarray:
+    """
+    Convert int64 array of nanoseconds since epoch into nanoseconds of local
+    wall time in tz, so that dates and times can be computed by numpy.
+
+    Naive datetimes are already stored as wall time.
+    """
+    if tz is None or not len(ns):
+        return ns
+
+    def get_offsets(values: np.ndarray) -> np.ndarray:
+        return np.array(
+            [from_ns(int(value), tz).utcoffset() // MICROSECOND * 1000 for value in values],
+            dtype=np.int64
+        )
+
+    days: np.ndarray = ns // DAY_NS
+    first: int = int(days.min())
+    last: int = int(days.max())
+
+    if len(ns) <= last - first + 2:
+        return ns + get_offsets(ns)
+
+    # Offset is looked up at the start of each day, and one by one for
+    # bars of days when offset is changed
+    day_offsets: np.ndarray = get_offsets(np.arange(first, last + 2, dtype=np.int64) * DAY_NS)
+    offsets: np.ndarray = day_offsets[days - first]
+
+    changed: np.ndarray = np.flatnonzero(day_offsets[1:] != day_offsets[:-1])
+    if len(changed):
+        mask: np.ndarray = np.isin(days - first, changed)
+        offsets[mask] = get_offsets(ns[mask])
+
+    return ns + offsets
+
+
+def to_ns_array(dts: Sequence[datetime] | np.ndarray) -> np.ndarray:
+    """
+    Convert many datetimes into int64 array of nanoseconds since epoch.
+
+    numpy datetime64 values are taken as UTC, the same as aware datetime.
+    """
+    if isinstance(dts, np.ndarray):
+        if np.issubdtype(dts.dtype, np.datetime64):
+            return dts.astype("datetime64[ns]").view(np.int64)
+        if np.issubdtype(dts.dtype, np.integer):
+            return dts.astype(np.int64, copy=False)
+
+    return np.fromiter((to_ns(dt) for dt in dts), dtype=np.int64, count=len(dts))
@@ -0,0 +1,139 @@
+import os
+from multiprocessing import get_context
+from typing import Callable, List, Sequence
+
+from vnpy.trader.ui import QtCore, QtGui, QtWidgets
+from vnpy.trader.object import BarData
+
+from .base import BLACK_COLOR
+from .widget import ChartWidget
+
+
+class ChartExporter:
+    """
+    Render charts into images without showing any window.
+
+    Plots and items are added once by setup function, and the same widget with
+    its pens, fonts and pixmaps is reused for every chart rendered.
+
+    QApplication should be created before, with offscreen platform if there
+    is no display.
+    """
+
+    def __init__(
+        self,
+        setup: Callable[[ChartWidget], None],
+        width: int = 1200,
+        height: int = 800
+    ) -> None:
+        """
+        setup is called with ChartWidget to add plots and items.
+        """
+        self._widget: ChartWidget = ChartWidget()
+        self._widget.setAttribute(QtCore.Qt.WidgetAttribute.WA_DontShowOnScreen)
+
+        setup(self._widget)
+
+        # Widget is laid out but never shown on screen
+        self._widget.resize(width, height)
+        self._widget.show()
+
+    def render(self, bars: List[BarData]) -> QtGui.QImage:
+        """
+        Render chart of bars into image.
+        """
+        self._widget.clear_all()
+        self._widget.update_history(bars)
+
+        image: QtGui.QImage = QtGui.QImage(self._widget.size(), QtGui.QImage.Format.Format_ARGB32)
+        image.fill(QtGui.QColor(*BLACK_COLOR))
+
+        painter: QtGui.QPainter = QtGui.QPainter(image)
+        self._widget.render(painter)
+        painter.end()
+
+        return image
+
+    def save(self, bars: List[BarData], path: str) -> bool:
+        """
+        Render chart of bars into image file, format is taken from suffix of path.
+        """
+        return self.render(bars).save(path)
+
+
+# Exporter and arguments kept in each worker process of export_charts
+_exporter: ChartExporter = None
+_load_bars: Callable[[str], List[BarData]] = None
+_folder: str = ""
+
+
+def export_charts(
+    symbols: Sequence[str],
+    load_bars: Callable[[str], List[BarData]],
+    setup: Callable[[ChartWidget], None],
+    folder: str,
+    width: int = 1200,
+    height: int = 800,
+    processes: int = None
+) -> List[str]:
+    """
+    Render chart of each symbol into PNG file named by symbol in folder.
+
+    Symbols are rendered by a pool of processes, one for each CPU by default.
+    Each process creates one ChartExporter and reuses it for all its symbols.
+    load_bars and setup are sent to processes, so they should be functions
+    defined at module level.
+
+    Return paths of files written, symbols without bars are skipped.
+    """
+    os.makedirs(folder, exist_ok=True)
+
+    # Qt is not safe to be forked, so processes are spawned
+    context = get_context("spawn")
+
+    with context.Pool(
+        processes,
+        initializer=_init_worker,
+        initargs=(load_bars, setup, folder, width, height)
+    ) as pool:
+        paths: List[str] = [path for path in pool.imap_unordered(_export_symbol, symbols) if path]
+
+    return paths
+
+
+def _init_worker(
+    load_bars: Callable[[str], List[BarData]],
+    setup: Callable[[ChartWidget], None],
+    folder: str,
+    width: int,
+    height: int
+) -> None:
+    """
+    Create QApplication and exporter in worker process.
+    """
+    global _exporter, _load_bars, _folder
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    app: QtWidgets.QApplication = QtWidgets.QApplication.instance()
+    if not app:
+        app = QtWidgets.QApplication([])
+
+    _exporter = ChartExporter(setup, width, height)
+    _load_bars = load_bars
+    _folder = folder
+
+
+def _export_symbol(symbol: str) -> str:
+    """
+    Render chart of one symbol in worker process.
+    """
+    bars: List[BarData] = _load_bars(symbol)
+    if not bars:
+        return ""
+
+    path: str = os.path.join(_folder, f"{symbol}.png")
+    if not _exporter.save(bars, path):
+        return ""
+
+    return path
@@ -1,66 +1,67 @@
 from typing import Tuple
 
-from vnpy.trader.ui import QtCore, QtGui
+import numpy as np
+from vnpy.trader.ui import QtGui
 from vnpy.trader.object import BarData
 
 from ..base import BAR_WIDTH
 from ..manager import BarManager
-from .utils import format_decimal
+from .utils import format_decimal, to_lines, to_rects
 from .chart_item import ChartItem
 
 
 class CandleItem(ChartItem):
+    LOD_ENABLED: bool = True
+    Y_RANGE_KEY: str = "price"
+
     def __init__(self, manager: BarManager) -> None:
         super().__init__(manager)
 
-    def _draw_bar_picture(self, ix: int, bar: BarData) -> QtGui.QPicture:
-        # Create objects
-        candle_picture: QtGui.QPicture = QtGui.QPicture()
-        painter: QtGui.QPainter = QtGui.QPainter(candle_picture)
-
-        # Set painter color
-        if bar.close_price >= bar.open_price:
-            painter.setPen(self._up_pen)
-            painter.setBrush(self._black_brush)
-        else:
-            painter.setPen(self._down_pen)
-            painter.setBrush(self._down_brush)
-
-        # Draw candle shadow
-        if bar.high_price > bar.low_price:
-            painter.drawLine(
-                QtCore.QPointF(ix, bar.high_price),
-                QtCore.QPointF(ix, bar.low_price)
-            )
-
-        # Draw candle body
-        if bar.open_price == bar.close_price:
-            painter.drawLine(
-                QtCore.QPointF(ix - BAR_WIDTH, bar.open_price),
-                QtCore.QPointF(ix + BAR_WIDTH, bar.open_price),
-            )
-        else:
-            rect: QtCore.QRectF = QtCore.QRectF(
-                ix - BAR_WIDTH,
-                bar.open_price,
-                BAR_WIDTH * 2,
-                bar.close_price - bar.open_price
-            )
-            painter.drawRect(rect)
-
-        # Finish
-        painter.end()
-        return candle_picture
-
-    def boundingRect(self) -> QtCore.QRectF:
-        min_price, max_price = self._manager.get_price_range()
-        rect: QtCore.QRectF = QtCore.QRectF(
-            0,
-            min_price,
-            len(self._bar_pictures),
-            max_price - min_price
-        )
-        return rect
+    def _draw_range(self, painter: QtGui.QPainter, min_ix: int, max_ix: int, level: int) -> None:
+        """
+        Draw all candles in batch, grouped by color.
+        """
+        xs, size, bars = self._get_range_bars(min_ix, max_ix, level)
+
+        # Merged bars fill their width, so that envelopes have no gap in between
+        half_width: float = BAR_WIDTH if size == 1 else size / 2
+
+        open_price: np.ndarray = bars["open_price"]
+        high_price: np.ndarray = bars["high_price"]
+        low_price: np.ndarray = bars["low_price"]
+        close_price: np.ndarray = bars["close_price"]
+
+        up: np.ndarray = close_price >= open_price
+
+        for mask, pen, brush in [
+            (up, self._up_pen, self._black_brush),
+            (~up, self._down_pen, self._down_brush)
+        ]:
+            painter.setPen(pen)
+            painter.setBrush(brush)
+
+            # Draw candle shadow
+            shadow: np.ndarray = mask & (high_price > low_price)
+            if shadow.any():
+                x: np.ndarray = xs[shadow]
+                painter.drawLines(to_lines(x, high_price[shadow], x, low_price[shadow]))
+
+            # Draw candle body
+            body: np.ndarray = mask & (open_price != close_price)
+            if body.any():
+                painter.drawRects(to_rects(
+                    xs[body] - half_width,
+                    open_price[body],
+                    np.full(body.sum(), half_width * 2),
+                    close_price[body] - open_price[body]
+                ))
+
+            # Draw line for doji
+            doji: np.ndarray = mask & (open_price == close_price)
+            if doji.any():
+                x: np.ndarray = xs[doji]
+                y: np.ndarray = open_price[doji]
+                painter.drawLines(to_lines(x - half_width, y, x + half_width, y))
 
     def get_y_range(self, min_ix: int = None, max_ix: int = None) -> Tuple[float, float]:
         min_price, max_price = self._manager.get_price_range(min_ix, max_ix)
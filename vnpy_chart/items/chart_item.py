@@ -1,17 +1,38 @@
 from abc import abstractmethod
+from collections import OrderedDict
+from math import log2
 from typing import List, Dict, Tuple
 
+import numpy as np
 import pyqtgraph as pg
 from vnpy.trader.ui import QtCore, QtGui, QtWidgets
 from vnpy.trader.object import BarData
 
 from ..base import BLACK_COLOR, UP_COLOR, DOWN_COLOR, PEN_WIDTH
 from ..manager import BarManager
+from ..pyramid import LOD_FIELDS
+
+
+TILE_SIZE = 256                     # Bars (merged bars if zoomed out) in one tile
+TILE_CACHE_SIZE = 16 * 1024 * 1024  # Bytes of tile pictures kept for each item
 
 
 class ChartItem(pg.GraphicsObject):
     """"""
 
+    # Whether merged bars can be drawn when there are many bars in one pixel
+    LOD_ENABLED: bool = False
+
+    # Number of bars on each side whose drawing depends on a changed bar
+    DIRTY_RADIUS: int = 0
+
+    # Pixels on each side of changed bars repainted, for drawings wider than bars
+    DIRTY_MARGIN: int = 2
+
+    # Items in the same plot with the same key share one query of y-axis
+    # range, None if range of item is queried on its own
+    Y_RANGE_KEY: str = None
+
     def __init__(self, manager: BarManager) -> None:
         """"""
         super().__init__()
@@ -19,7 +40,16 @@ class ChartItem(pg.GraphicsObject):
         self._manager: BarManager = manager
 
         self._bar_pictures: Dict[int, QtGui.QPicture] = {}
-        self._item_picture: QtGui.QPicture = None
+
+        # Pictures of tiles keyed by (level, tile, style version)
+        self._tiles: OrderedDict[Tuple[int, int, int], QtGui.QPicture] = OrderedDict()
+        self._tiles_size: int = 0
+        self._style_version: int = 0
+
+        # First index of live bars drawn on top of tiles, None if no live bar
+        self._hot_ix: int = None
+
+        self._downsample_mode: str = "peak"
 
         self._black_brush: QtGui.QBrush = pg.mkBrush(color=BLACK_COLOR)
 
@@ -33,28 +63,48 @@ class ChartItem(pg.GraphicsObject):
         )
         self._down_brush: QtGui.QBrush = pg.mkBrush(color=DOWN_COLOR)
 
-        self._rect_area: Tuple[float, float] = None
-
         # Very important! Only redraw the visible part and improve speed a lot.
         self.setFlag(self.GraphicsItemFlag.ItemUsesExtendedStyleOption)
 
-        # Force update during the next paint
-        self._to_update: bool = False
-        self._to_repaint: bool = False
+        # Keep painted item in a pixmap, so that moving cursor over it only
+        # copies the pixmap instead of painting bars again
+        self.setCacheMode(self.CacheMode.DeviceCoordinateCache)
+
+        self._manager.add_listener(self.update_range)
 
-    @abstractmethod
     def _draw_bar_picture(self, ix: int, bar: BarData) -> QtGui.QPicture:
         """
         Draw picture for specific bar.
+
+        Used by the default _draw_range, which caches pictures bar by bar.
+        Subclass drawing bars in batch by reimplementing _draw_range does
+        not need to implement this.
         """
-        pass
+        return QtGui.QPicture()
 
-    @abstractmethod
     def boundingRect(self) -> QtCore.QRectF:
         """
         Get bounding rectangles for item.
+
+        Item is bounded by visible area of view instead of whole data set, so
+        that the device cache is never larger than view.
         """
-        pass
+        rect: QtCore.QRectF = self.viewRect()
+        if rect is None:
+            return QtCore.QRectF()
+
+        # View rect is cached by pyqtgraph, so a copy is returned
+        return QtCore.QRectF(rect)
+
+    def viewTransformChanged(self) -> None:
+        """
+        Reimplement to move bounding rect with visible area of view.
+
+        Cached pixmap stays at the same place of view, so it is redrawn.
+        """
+        self.prepareGeometryChange()
+        super().viewTransformChanged()
+        self.update()
 
     @abstractmethod
     def get_y_range(self, min_ix: int = None, max_ix: int = None) -> Tuple[float, float]:
@@ -79,12 +129,9 @@ class ChartItem(pg.GraphicsObject):
         """
         Update a list of bar data.
         """
+        self._hot_ix = None
         self._bar_pictures.clear()
-
-        bars: List[BarData] = self._manager.get_all_bars()
-        for ix, bar in enumerate(bars):
-            self._bar_pictures[ix] = None
-
+        self._clear_tiles()
         self.update()
 
     def update_bar(self, bar: BarData) -> None:
@@ -92,18 +139,109 @@ class ChartItem(pg.GraphicsObject):
         Update single bar data.
         """
         ix: int = self._manager.get_index(bar.datetime)
+        self.update_range(ix, ix + 1)
 
-        self._bar_pictures[ix] = None
+    def update_range(self, start: int, end: int, shift: int = 0) -> None:
+        """
+        Update bars changed within index range [start, end).
 
-        self.update()
+        If indexes of existing bars are moved by shift, all bar pictures are
+        dropped since they are drawn at the old index. Otherwise only tiles
+        and bar pictures within DIRTY_RADIUS of changed bars are dropped.
+
+        If only the last bar is changed, which happens on every live tick, it
+        becomes the hot bar drawn on top of tiles, so that tiles are redrawn
+        only once when a new bar is added.
+        """
+        if shift:
+            self._hot_ix = None
+            self._bar_pictures.clear()
+            self._clear_tiles()
+            self.update()
+            return
+
+        radius: int = self.DIRTY_RADIUS
+        hot_ix: int = self._hot_ix
+
+        if end == self._manager.get_count() and end - start == 1:
+            # Tiles drawn with bars before the new hot bar are outdated
+            if hot_ix != start:
+                self._drop_tiles(min(start, end if hot_ix is None else hot_ix) - radius, end)
+                self._hot_ix = start
+        else:
+            self._drop_tiles(start - radius, end + radius)
+
+            # Hot bars are drawn into tiles again
+            if hot_ix is not None:
+                self._drop_tiles(hot_ix - radius, self._manager.get_count())
+                self._hot_ix = None
+
+        self._drop_bar_pictures(start - radius, end + radius)
+        self._update_bars(start - radius, end + radius)
+
+    def _update_bars(self, start: int, end: int) -> None:
+        """
+        Refresh only the part of item with bars within index range [start, end),
+        so that other bars in the cached pixmap are not painted again.
+        """
+        rect: QtCore.QRectF = self.boundingRect()
+        if rect.isEmpty():
+            return
+
+        # Merged bars containing changed bars are redrawn as a whole
+        level: int = self._get_lod_level()
+        left: int = (start >> level) << level
+        right: int = (((end - 1) >> level) + 1) << level
+        margin: float = self.DIRTY_MARGIN * self.pixelWidth() + 1
+
+        rect.setLeft(max(rect.left(), left - margin))
+        rect.setRight(min(rect.right(), right + margin))
+        if rect.width() > 0:
+            self.update(rect)
+
+    def _drop_tiles(self, start: int, end: int) -> None:
+        """
+        Drop tiles of all levels overlapping index range [start, end).
+        """
+        for key in list(self._tiles):
+            level, tile, _ = key
+            size: int = TILE_SIZE << level
+            if tile * size < end and start < (tile + 1) * size:
+                self._tiles_size -= self._tiles.pop(key).size()
+
+    def _drop_bar_pictures(self, start: int, end: int) -> None:
+        """
+        Drop bar pictures within index range [start, end).
+        """
+        start = max(start, 0)
+
+        if end - start < len(self._bar_pictures):
+            for ix in range(start, end):
+                self._bar_pictures.pop(ix, None)
+        else:
+            self._bar_pictures = {
+                ix: picture for ix, picture in self._bar_pictures.items()
+                if ix < start or ix >= end
+            }
+
+    def set_downsampling(self, mode: str = "peak") -> None:
+        """
+        Set how bars are drawn when there are many bars in one pixel.
 
-    def update(self) -> None:
+        With "peak", bars are merged into envelopes of one pixel wide or less,
+        which is the only mode supported by items with LOD_ENABLED. With any
+        other mode or None, every single bar is drawn.
         """
-        Refresh the item.
+        self._downsample_mode = mode
+        self.update_style()
+
+    def update_style(self) -> None:
         """
-        if self.scene():
-            self._to_update = True
-            self.scene().update()
+        Redraw all bars after pens or brushes are changed.
+        """
+        self._style_version += 1
+        self._bar_pictures.clear()
+        self.update()
 
     def paint(
         self,
@@ -118,47 +256,140 @@ class ChartItem(pg.GraphicsObject):
         """
         rect = opt.exposedRect
 
-        min_ix: int = int(rect.left())
-        max_ix: int = int(rect.right())
-        max_ix: int = min(max_ix, len(self._bar_pictures))
+        min_ix: int = max(int(rect.left()), 0)
+        max_ix: int = min(int(rect.right()), self._manager.get_count())
+        if max_ix <= min_ix:
+            return
+
+        level: int = self._get_lod_level()
+        first: int = (min_ix >> level) // TILE_SIZE
+        last: int = ((max_ix - 1) >> level) // TILE_SIZE
+
+        for tile in range(first, last + 1):
+            self._get_tile_picture(level, tile).play(painter)
+
+        hot_start: int = self._get_hot_start(level)
+        if hot_start < max_ix:
+            self._draw_range(painter, hot_start, self._manager.get_count(), level)
 
-        rect_area: tuple = (min_ix, max_ix)
-        if (
-            self._to_update
-            or rect_area != self._rect_area
-            or not self._item_picture
-        ):
-            self._to_update = False
-            self._rect_area = rect_area
-            self._draw_item_picture(min_ix, max_ix)
+    def _get_hot_start(self, level: int) -> int:
+        """
+        Get first index of bars not drawn into tiles, with bars depending on
+        hot bar and merged bar containing it.
+        """
+        if self._hot_ix is None:
+            return self._manager.get_count()
 
-        self._item_picture.play(painter)
+        return (max(self._hot_ix - self.DIRTY_RADIUS, 0) >> level) << level
 
-    def _draw_item_picture(self, min_ix: int, max_ix: int) -> None:
+    def _get_tile_picture(self, level: int, tile: int) -> QtGui.QPicture:
         """
-        Draw the picture of item in specific range.
+        Get picture of bars within tile, draw it if not cached.
+
+        Tile of level k contains TILE_SIZE merged bars of level k. Least
+        recently used tiles are dropped when pictures exceed TILE_CACHE_SIZE.
         """
-        self._item_picture = QtGui.QPicture()
-        painter: QtGui.QPainter = QtGui.QPainter(self._item_picture)
+        key: Tuple[int, int, int] = (level, tile, self._style_version)
+
+        picture: QtGui.QPicture = self._tiles.get(key, None)
+        if picture is not None:
+            self._tiles.move_to_end(key)
+            return picture
+
+        size: int = TILE_SIZE << level
+        min_ix: int = tile * size
+        max_ix: int = min(min_ix + size, self._get_hot_start(level))
+
+        picture = QtGui.QPicture()
+        painter: QtGui.QPainter = QtGui.QPainter(picture)
+        if max_ix > min_ix:
+            self._draw_range(painter, min_ix, max_ix, level)
+        painter.end()
+
+        self._tiles[key] = picture
+        self._tiles_size += picture.size()
+
+        while self._tiles_size > TILE_CACHE_SIZE and len(self._tiles) > 1:
+            self._tiles_size -= self._tiles.popitem(last=False)[1].size()
 
+        return picture
+
+    def _draw_range(self, painter: QtGui.QPainter, min_ix: int, max_ix: int, level: int) -> None:
+        """
+        Draw bars within [min_ix, max_ix) with painter.
+
+        Bar pictures are drawn and cached one by one by default, subclass can
+        reimplement this to draw all bars in batch, and merged bars of level
+        if LOD_ENABLED is True.
+        """
         for ix in range(min_ix, max_ix):
-            bar_picture: QtGui.QPicture = self._bar_pictures[ix]
+            bar_picture: QtGui.QPicture = self._bar_pictures.get(ix, None)
 
-            if bar_picture is None or self._to_repaint:
+            if bar_picture is None:
                 bar: BarData = self._manager.get_bar(ix)
                 bar_picture = self._draw_bar_picture(ix, bar)
                 self._bar_pictures[ix] = bar_picture
 
             bar_picture.play(painter)
 
-        self._to_repaint = False
+    def _get_range_bars(
+        self,
+        min_ix: int,
+        max_ix: int,
+        level: int
+    ) -> Tuple[np.ndarray, int, Dict[str, np.ndarray]]:
+        """
+        Get bars within [min_ix, max_ix) for drawing in batch.
 
-        painter.end()
+        Return x positions of bar centers, width of one bar in index, and
+        columns of bars, which are merged bars if level is not 0.
+
+        Merged bar has open of its first bar, close of its last bar, max high,
+        min low, summed volume and max volume, see BarPyramid. Max volume of
+        single bar is its volume.
+        """
+        if level:
+            first, columns = self._manager.get_lod_bars(level, min_ix, max_ix - 1)
+            size: int = 1 << level
+            count: int = len(columns["open_price"])
+            xs: np.ndarray = np.arange(first, first + count) * size + (size - 1) / 2
+            return xs, size, columns
+
+        columns: Dict[str, np.ndarray] = {
+            name: self._manager.get_array(name, min_ix, max_ix - 1) for name in LOD_FIELDS
+        }
+        columns["max_volume"] = columns["volume"]
+        xs: np.ndarray = np.arange(min_ix, min_ix + len(columns["open_price"]), dtype=np.float64)
+        return xs, 1, columns
+
+    def _get_lod_level(self) -> int:
+        """
+        Get level of merged bars to draw, with number of bars in one pixel.
+
+        Level 0 means drawing every single bar. Merged bars of level k are
+        made of 2 ** k bars, which is between half and one pixel wide.
+        """
+        if not self.LOD_ENABLED or self._downsample_mode != "peak":
+            return 0
+
+        bar_count: float = self.pixelWidth()
+        if bar_count < 2:
+            return 0
+
+        return int(log2(bar_count))
 
     def clear_all(self) -> None:
         """
         Clear all data in the item.
         """
-        self._item_picture = None
+        self._hot_ix = None
         self._bar_pictures.clear()
+        self._clear_tiles()
         self.update()
+
+    def _clear_tiles(self) -> None:
+        """
+        Drop all tile pictures.
+        """
+        self._tiles.clear()
+        self._tiles_size = 0
@@ -1,16 +1,17 @@
 import os
 from enum import Enum
 
+import numpy as np
 import pyqtgraph as pg
-from vnpy.trader.ui import QtCore, QtGui
-from vnpy.trader.object import BarData
+from vnpy.trader.ui import QtCore, QtGui, QtWidgets
 
-from ..base import BAR_WIDTH
-from ..manager import BarManager
+from ..manager import BarManager, EXTRA_TAG
 from .chart_item import ChartItem
+from .utils import format_decimal
 
 
 MIN_ICON_SIZE = 12
+ATLAS_PADDING = 2           # Transparent pixels between icons in atlas
 
 ASSETS_FOLER = os.path.join(os.path.dirname(__file__), '../assets/')
 
@@ -22,116 +23,129 @@ class IconEnum(Enum):
     SMILEY_FACE = 'smiley_face.png'
 
 
+class IconAtlas:
+    """
+    All icon assets packed side by side into one pixmap.
+
+    Atlas is built once per process and shared by all icon items, so that
+    icons of any kind can be drawn with one drawPixmapFragments call.
+    """
+
+    _instance: "IconAtlas" = None
+
+    def __init__(self) -> None:
+        """"""
+        images: dict[IconEnum, QtGui.QImage] = {
+            icon: QtGui.QImage(os.path.join(ASSETS_FOLER, icon.value)) for icon in IconEnum
+        }
+
+        width: int = sum(image.width() + ATLAS_PADDING for image in images.values())
+        height: int = max(image.height() for image in images.values())
+
+        atlas: QtGui.QImage = QtGui.QImage(width, height, QtGui.QImage.Format.Format_ARGB32_Premultiplied)
+        atlas.fill(QtCore.Qt.GlobalColor.transparent)
+
+        self.rects: dict[IconEnum, QtCore.QRectF] = {}
+
+        painter: QtGui.QPainter = QtGui.QPainter(atlas)
+        left: int = 0
+        for icon, image in images.items():
+            painter.drawImage(left, 0, image)
+            self.rects[icon] = QtCore.QRectF(left, 0, image.width(), image.height())
+            left += image.width() + ATLAS_PADDING
+        painter.end()
+
+        self.pixmap: QtGui.QPixmap = QtGui.QPixmap.fromImage(atlas)
+
+    @classmethod
+    def get_instance(cls) -> "IconAtlas":
+        """
+        Get the shared atlas, build it at the first call.
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+
 class IconItem(ChartItem):
-    def __init__(self, manager: BarManager) -> None:
-        super().__init__(manager)
+    """
+    Icons are drawn in device coordinates from the latest view transform, so
+    that nothing is redrawn into pictures when the view is zoomed or moved.
 
-        self._pixmaps = {}
+    Icon is as wide as one bar on screen, but at least MIN_ICON_SIZE pixels.
+    All visible icons are drawn from the shared IconAtlas in one call.
+    """
 
-    def be_added_to_parent(self):
-        vb = self._get_client_viewbox()
-        vb.sigXRangeChanged.connect(self.set_to_repaint)
-        vb.sigYRangeChanged.connect(self.set_to_repaint)
+    DIRTY_MARGIN: int = MIN_ICON_SIZE
+    Y_RANGE_KEY: str = "price"
 
-    def viewTransformChanged(self):
-        super().viewTransformChanged()
-        self.set_to_repaint()
-        self.update()
+    def __init__(self, manager: BarManager) -> None:
+        super().__init__(manager)
 
-    def boundingRect(self) -> QtCore.QRectF:
-        min_price, max_price = self._manager.get_price_range()
-        rect: QtCore.QRectF = QtCore.QRectF(
-            0,
-            min_price,
-            self._manager.get_count(),
-            max_price - min_price
-        )
-        return rect
+        # Reused buffer of PixmapFragment, fields are x, y, sourceLeft,
+        # sourceTop, width, height, scaleX, scaleY, rotation and opacity.
+        self._fragments = pg.Qt.internals.PrimitiveArray(QtGui.QPainter.PixmapFragment, 10)
 
     def get_y_range(self, min_ix: int = None, max_ix: int = None) -> tuple[float, float]:
         min_price, max_price = self._manager.get_price_range(min_ix, max_ix)
         return min_price, max_price
 
     def get_info_text(self, ix: int) -> str:
-        return ''
-
-    def _draw_bar_picture(self, ix: int, bar: BarData) -> QtGui.QPicture:
-        picture: QtGui.QPicture = QtGui.QPicture()
-        painter: QtGui.QPainter = QtGui.QPainter(picture)
-
-        icons: list[tuple[IconEnum, float]] = (
-            bar.extra or {}).get('icons') or []
-        if len(icons) > 0:
-            for icon, y in icons:
-                pixmap = self._get_pixmap(icon)
-                ratio = self._get_aspect_ratio()
-                client_ratio = self._get_client_aspect_ratio()
-                w = self._get_icon_width()
-                h = w / ratio * client_ratio
-                rect: QtCore.QRectF = QtCore.QRectF(
-                    ix - w/2,
-                    y,
-                    w,
-                    h,
-                )
-                painter.drawPixmap(rect, pixmap, pixmap.rect())
-
-        painter.end()
-        return picture
-
-    def set_to_repaint(self):
-        self._to_repaint = True
-
-    def _get_pixmap(self, icon: IconEnum) -> QtGui.QPixmap:
-        if not icon.value in self._pixmaps:
-            pixmap = QtGui.QPixmap(os.path.join(ASSETS_FOLER, icon.value))
-
-            # 因为Y坐标系是越大越在上，所以要翻转图片
-            transform = QtGui.QTransform()
-            transform.scale(1, -1)
-            transform.translate(0, -pixmap.height())
-            pixmap = pixmap.transformed(transform)
-
-            self._pixmaps[icon.value] = pixmap
-        return self._pixmaps[icon.value]
-
-    def _get_plot_item(self) -> pg.PlotItem:
-        parent = self.parentItem()
-        while parent is not None:
-            if isinstance(parent, pg.PlotItem):
-                return parent
-            parent = parent.parentItem()
-        raise Exception('IconItem is not in any PlotItem')
-
-    def _get_client_viewbox(self) -> pg.ViewBox:
-        parent = self.parentItem()
-        while parent is not None:
-            if isinstance(parent, pg.ViewBox):
-                return parent
-            parent = parent.parentItem()
-        raise Exception('IconItem is not in any ViewBox')
-
-    def _get_client_width(self) -> float:
-        vb = self._get_client_viewbox()
-        return vb.width()
-
-    def _get_client_aspect_ratio(self) -> float:
-        vb = self._get_client_viewbox()
-        return vb.width() / vb.height()
-
-    def _get_aspect_ratio(self) -> float:
-        view_rect = self.viewRect()
-        return view_rect.width() / view_rect.height()
-
-    def _get_bar_count(self) -> int:
-        plot_item = self._get_plot_item()
-        vb = plot_item.getViewBox()
-        xrange = vb.viewRange()[0]
-        return xrange[1] - xrange[0]
-
-    def _get_icon_width(self) -> float:
-        client_width = self._get_client_width()
-        bar_count = self._get_bar_count()
-        if client_width / bar_count < MIN_ICON_SIZE:
-            return MIN_ICON_SIZE / (client_width / bar_count)
-        return 1
+        """
+        Show tags of icons added with tag, icons marked in extra are not shown.
+        """
+        words: list[str] = []
+
+        for icon, (ixs, values, tags) in self._manager.get_icons(ix, ix).items():
+            for value, tag in zip(values.tolist(), tags.tolist()):
+                if tag and tag != EXTRA_TAG:
+                    words.append(f"{tag}: {format_decimal(value)}")
+
+        return '\n'.join(words)
+
+    def paint(
+        self,
+        painter: QtGui.QPainter,
+        opt: QtWidgets.QStyleOptionGraphicsItem,
+        w: QtWidgets.QWidget
+    ) -> None:
+        rect = opt.exposedRect
+
+        # Icon wider than one bar may be seen from bars just out of range
+        min_ix: int = max(int(rect.left()) - 1, 0)
+        max_ix: int = min(int(rect.right()) + 1, self._manager.get_count() - 1)
+        if max_ix < min_ix:
+            return
+
+        icons: dict = self._manager.get_icons(min_ix, max_ix)
+        if not icons:
+            return
+
+        atlas: IconAtlas = IconAtlas.get_instance()
+        transform: QtGui.QTransform = painter.transform()
+        width: float = max(abs(transform.m11()), MIN_ICON_SIZE)
+
+        self._fragments.resize(sum(len(ixs) for ixs, _, _ in icons.values()))
+        fragments: np.ndarray = self._fragments.ndarray()
+
+        start: int = 0
+        for icon, (ixs, values, tags) in icons.items():
+            source: QtCore.QRectF = atlas.rects[icon]
+            scale: float = width / source.width()
+            height: float = source.height() * scale
+
+            end: int = start + len(ixs)
+            part: np.ndarray = fragments[start:end]
+
+            # Fragment is positioned by its center, bottom of icon is at y
+            part[:, 0] = transform.m11() * ixs + transform.m21() * values + transform.dx()
+            part[:, 1] = transform.m12() * ixs + transform.m22() * values + transform.dy() - height / 2
+            part[:, 2:] = (
+                source.left(), source.top(), source.width(), source.height(), scale, scale, 0, 1
+            )
+            start = end
+
+        painter.save()
+        painter.resetTransform()
+        painter.drawPixmapFragments(*self._fragments.drawargs(), atlas.pixmap)
+        painter.restore()
@@ -1,9 +1,9 @@
 import os
 from enum import Enum
 
+import numpy as np
 import pyqtgraph as pg
-from vnpy.trader.ui import QtCore, QtGui
-from vnpy.trader.object import BarData
+from vnpy.trader.ui import QtGui, QtWidgets
 
 from ..manager import BarManager
 from .chart_item import ChartItem
@@ -23,55 +23,141 @@ LineType = tuple[str, float, LineColor, int | None]
 
 
 class LineItem(ChartItem):
+    LOD_ENABLED: bool = True
+    Y_RANGE_KEY: str = "price"
+
+    # Segment drawn to a bar starts from the previous bar
+    DIRTY_RADIUS: int = 1
+
     def __init__(self, manager: BarManager) -> None:
         super().__init__(manager)
 
         self.pens: dict[str, QtGui.QPen] = {}
 
-    def boundingRect(self) -> QtCore.QRectF:
-        min_price, max_price = self._manager.get_price_range()
-        rect: QtCore.QRectF = QtCore.QRectF(
-            0,
-            min_price,
-            len(self._bar_pictures),
-            max_price - min_price
-        )
-        return rect
+        # Cached path of each line series: (level, start, end, path)
+        self._paths: dict[str, tuple[int, int, int, QtGui.QPainterPath]] = {}
+
+    def update_range(self, start: int, end: int, shift: int = 0) -> None:
+        """
+        Cached paths are kept if bars changed are all after them.
+
+        Cached path of [start, end) ends at bar end - 1, the segment to bar
+        end is drawn with the tail, so that ticks of the last bar keep it.
+        """
+        if shift:
+            self._paths.clear()
+        else:
+            self._paths = {
+                label: cache for label, cache in self._paths.items()
+                if cache[2] <= start
+            }
+
+        super().update_range(start, end, shift)
 
     def get_y_range(self, min_ix: int = None, max_ix: int = None) -> tuple[float, float]:
         min_price, max_price = self._manager.get_price_range(min_ix, max_ix)
         return min_price, max_price
 
     def get_info_text(self, ix: int) -> str:
-        bar: BarData = self._manager.get_bar(ix)
-        if not bar:
+        if ix < 0 or ix >= self._manager.get_count():
             return ''
 
-        lines: list[LineType] = (bar.extra or {}).get('lines') or []
-        text: str = ''
-        for idx, (label, y, color, width) in enumerate(lines):
-            text += '\n' if idx > 0 else ''
-            text += f"{label}: {format_decimal(y)}"
-        return text
-
-    def _draw_bar_picture(self, ix: int, bar: BarData) -> QtGui.QPicture:
-        picture: QtGui.QPicture = QtGui.QPicture()
-        painter: QtGui.QPainter = QtGui.QPainter(picture)
-
-        lines: list[LineType] = (bar.extra or {}).get('lines') or []
-        if len(lines) > 0:
-            for label, y, color, width in lines:
-                previous_value = self.get_line_value(ix-1, label)
-                value = self.get_line_value(ix, label)
-
-                if value is not None and previous_value is not None:
-                    painter.setPen(self.get_pen(color, width=width))
-                    start_point = QtCore.QPointF(ix-1, previous_value)
-                    end_point = QtCore.QPointF(ix, value)
-                    painter.drawLine(start_point, end_point)
-
-        painter.end()
-        return picture
+        words: list[str] = []
+        for label in self._manager.get_line_styles():
+            value: float = self._manager.get_array(label, ix, ix)[0]
+            if not np.isnan(value):
+                words.append(f"{label}: {format_decimal(value)}")
+        return '\n'.join(words)
+
+    def paint(
+        self,
+        painter: QtGui.QPainter,
+        opt: QtWidgets.QStyleOptionGraphicsItem,
+        w: QtWidgets.QWidget
+    ) -> None:
+        """
+        Draw cached paths directly, instead of recording them into item picture.
+        """
+        rect = opt.exposedRect
+
+        min_ix: int = max(int(rect.left()), 0)
+        max_ix: int = min(int(rect.right()), self._manager.get_count())
+
+        if max_ix > min_ix:
+            self._draw_range(painter, min_ix, max_ix, self._get_lod_level())
+
+    def _draw_range(self, painter: QtGui.QPainter, min_ix: int, max_ix: int, level: int) -> None:
+        """
+        Draw each line series as one polyline, broken at bars without value.
+
+        If there are many bars in one pixel, only min and max of every 2 ** level
+        bars are drawn. Path before the last bar is cached and extended when new
+        bars are added, the last part which changes with live data is drawn
+        separately.
+        """
+        step: int = 1 << level
+
+        # Start from the previous bar to connect with the line out of range
+        start: int = max(min_ix - 1, 0) // step * step
+        split: int = (max_ix - 1) // step * step
+
+        for label, (color, width) in self._manager.get_line_styles().items():
+            painter.setPen(self.get_pen(color, width=width))
+
+            if split > start:
+                painter.drawPath(self._get_cached_path(label, level, start, split))
+
+            tail_start: int = max(split - step, start)
+            painter.drawPath(self._get_line_path(label, level, tail_start, max_ix))
+
+    def _get_cached_path(self, label: str, level: int, start: int, end: int) -> QtGui.QPainterPath:
+        """
+        Get path of bars within [start, end), extend the cached path if possible.
+        """
+        cache: tuple = self._paths.get(label, None)
+
+        # Cached path may start before view, but not longer than view, so
+        # that it is reused when view follows the latest bar.
+        if (
+            cache
+            and cache[0] == level
+            and start - (end - start) <= cache[1] <= start
+            and cache[2] <= end
+        ):
+            start, cached_end, path = cache[1:]
+            if cached_end < end:
+                path.addPath(self._get_line_path(label, level, cached_end - (1 << level), end))
+        else:
+            path: QtGui.QPainterPath = self._get_line_path(label, level, start, end)
+
+        self._paths[label] = (level, start, end, path)
+        return path
+
+    def _get_line_path(self, label: str, level: int, start: int, end: int) -> QtGui.QPainterPath:
+        """
+        Build path of line series within [start, end).
+
+        For level above 0, bars are grouped by 2 ** level, and min and max of
+        each group are added, so that number of points is limited by width of
+        view instead of number of bars.
+        """
+        values: np.ndarray = self._manager.get_array(label, start, end - 1)
+        if not len(values):
+            return QtGui.QPainterPath()
+
+        if not level:
+            xs: np.ndarray = np.arange(start, start + len(values), dtype=np.float64)
+            return pg.arrayToQPath(xs, values, connect="finite")
+
+        step: int = 1 << level
+        ixs: np.ndarray = np.arange(0, len(values), step)
+
+        xs: np.ndarray = np.repeat(start + ixs + (step - 1) / 2, 2)
+        ys: np.ndarray = np.empty(len(xs), dtype=np.float64)
+        ys[0::2] = np.fmin.reduceat(values, ixs)
+        ys[1::2] = np.fmax.reduceat(values, ixs)
+
+        return pg.arrayToQPath(xs, ys, connect="finite")
 
     def get_pen(self, color: LineColor, **kwg) -> QtGui.QPen:
         width = kwg.get('width') or 1
@@ -80,11 +166,15 @@ class LineItem(ChartItem):
             self.pens[key] = pg.mkPen(color=color.value, width=width)
         return self.pens[key]
 
+    def clear_all(self) -> None:
+        self._paths.clear()
+        super().clear_all()
+
     def get_line_value(self, ix: int, label: str) -> float:
-        if ix < 0:
+        if ix < 0 or ix >= self._manager.get_count():
+            return None
+
+        value: float = self._manager.get_array(label, ix, ix)[0]
+        if np.isnan(value):
             return None
-        bar = self._manager.get_bar(ix)
-        lines: list[LineType] = (bar.extra or {}).get('lines') or []
-        for _label, y, color, width in lines:
-            if _label == label:
-                return y
+        return float(value)
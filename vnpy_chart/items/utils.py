@@ -1,5 +1,37 @@
+from typing import List
+
+import numpy as np
+from vnpy.trader.ui import QtCore
+
+
 def format_decimal(number, decimal_places=2):
     formatted_number = f'{number:.{decimal_places}f}'
     if formatted_number.endswith('0' * decimal_places):
         return str(int(number))
     return formatted_number
+
+
+def to_lines(
+    x0: np.ndarray,
+    y0: np.ndarray,
+    x1: np.ndarray,
+    y1: np.ndarray
+) -> List[QtCore.QLineF]:
+    """
+    Convert arrays into line segments from (x0, y0) to (x1, y1) for QPainter.drawLines.
+    """
+    return list(map(QtCore.QLineF, x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist()))
+
+
+def to_rects(
+    x: np.ndarray,
+    y: np.ndarray,
+    width: np.ndarray,
+    height: np.ndarray
+) -> List[QtCore.QRectF]:
+    """
+    Convert arrays into rectangles with top-left at (x, y) for QPainter.drawRects.
+
+    Drawing many rectangles is much faster than filling one path of them.
+    """
+    return list(map(QtCore.QRectF, x.tolist(), y.tolist(), width.tolist(), height.tolist()))
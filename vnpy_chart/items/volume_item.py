@@ -1,52 +1,53 @@
 from typing import Tuple
 
-from vnpy.trader.ui import QtCore, QtGui
+import numpy as np
+from vnpy.trader.ui import QtGui
 from vnpy.trader.object import BarData
 
 from ..base import BAR_WIDTH
 from ..manager import BarManager
 from .chart_item import ChartItem
+from .utils import to_rects
 
 
 class VolumeItem(ChartItem):
+    LOD_ENABLED: bool = True
+    Y_RANGE_KEY: str = "volume"
+
     def __init__(self, manager: BarManager) -> None:
         super().__init__(manager)
 
-    def _draw_bar_picture(self, ix: int, bar: BarData) -> QtGui.QPicture:
-        # Create objects
-        volume_picture: QtGui.QPicture = QtGui.QPicture()
-        painter: QtGui.QPainter = QtGui.QPainter(volume_picture)
+    def _draw_range(self, painter: QtGui.QPainter, min_ix: int, max_ix: int, level: int) -> None:
+        """
+        Draw all volume bars in batch, one path for each color.
 
-        # Set painter color
-        if bar.close_price >= bar.open_price:
-            painter.setPen(self._up_pen)
-            painter.setBrush(self._up_brush)
-        else:
-            painter.setPen(self._down_pen)
-            painter.setBrush(self._down_brush)
-
-        # Draw volume body
-        rect: QtCore.QRectF = QtCore.QRectF(
-            ix - BAR_WIDTH,
-            0,
-            BAR_WIDTH * 2,
-            bar.volume
-        )
-        painter.drawRect(rect)
-
-        # Finish
-        painter.end()
-        return volume_picture
-
-    def boundingRect(self) -> QtCore.QRectF:
-        min_volume, max_volume = self._manager.get_volume_range()
-        rect: QtCore.QRectF = QtCore.QRectF(
-            0,
-            min_volume,
-            len(self._bar_pictures),
-            max_volume - min_volume
-        )
-        return rect
+        Merged volume is drawn as max volume of bars, which is the same as
+        drawing every bar in one pixel.
+        """
+        xs, size, bars = self._get_range_bars(min_ix, max_ix, level)
+
+        # Merged bars fill their width, so that envelopes have no gap in between
+        half_width: float = BAR_WIDTH if size == 1 else size / 2
+
+        volume: np.ndarray = bars["max_volume"]
+
+        up: np.ndarray = bars["close_price"] >= bars["open_price"]
+
+        for mask, pen, brush in [
+            (up, self._up_pen, self._up_brush),
+            (~up, self._down_pen, self._down_brush)
+        ]:
+            if not mask.any():
+                continue
+
+            painter.setPen(pen)
+            painter.setBrush(brush)
+            painter.drawRects(to_rects(
+                xs[mask] - half_width,
+                np.zeros(mask.sum()),
+                np.full(mask.sum(), half_width * 2),
+                volume[mask]
+            ))
 
     def get_y_range(self, min_ix: int = None, max_ix: int = None) -> Tuple[float, float]:
         min_volume, max_volume = self._manager.get_volume_range(min_ix, max_ix)
@@ -0,0 +1,199 @@
+from datetime import datetime, timedelta
+from threading import Thread
+from typing import List
+
+from vnpy.trader.ui import QtCore
+from vnpy.trader.object import BarData
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import BaseDatabase, BarOverview, DB_TZ, get_database, convert_tz
+
+
+INTERVAL_DELTA_MAP: dict[Interval, timedelta] = {
+    Interval.MINUTE: timedelta(minutes=1),
+    Interval.HOUR: timedelta(hours=1),
+    Interval.DAILY: timedelta(days=1),
+    Interval.WEEKLY: timedelta(days=7),
+}
+
+# Times to widen the datetime span of one page when not enough bars are found
+MAX_EXPAND_COUNT = 12
+
+
+def to_db_datetime(dt: datetime) -> datetime:
+    """
+    Convert datetime into naive datetime of database timezone.
+
+    Naive datetime is taken as already in database timezone.
+    """
+    if dt.tzinfo:
+        return convert_tz(dt)
+    return dt
+
+
+class HistoryLoader(QtCore.QObject):
+    """
+    Load history bars of one contract from vnpy database page by page.
+
+    The latest page is loaded at once, older pages are loaded in a background
+    thread and sent back with signal_page to the GUI thread.
+    """
+
+    signal_page: QtCore.Signal = QtCore.Signal(list)
+
+    def __init__(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        page_size: int = 1000,
+        end: datetime = None
+    ) -> None:
+        """"""
+        super().__init__()
+
+        self.symbol: str = symbol
+        self.exchange: Exchange = exchange
+        self.interval: Interval = interval
+        self.page_size: int = page_size
+
+        self._end: datetime = end
+        self._start: datetime = None
+
+        self._database: BaseDatabase = None
+        self._loading: bool = False
+        self._finished: bool = False
+
+        # Connected first, so that loading flag is cleared before other slots
+        self.signal_page.connect(self._process_page)
+
+    def load_latest(self) -> List[BarData]:
+        """
+        Load the latest page of bars synchronously.
+        """
+        if self._end:
+            end: datetime = to_db_datetime(self._end)
+        else:
+            end: datetime = datetime.now(DB_TZ).replace(tzinfo=None)
+
+        return self._load_page(end)
+
+    def request_older(self, dt: datetime) -> bool:
+        """
+        Start loading the page of bars before datetime in background.
+
+        Return False if a page is still being loaded or there are no more bars.
+        """
+        if self._loading or self._finished:
+            return False
+
+        self._loading = True
+
+        thread: Thread = Thread(target=self._run_older, args=(dt,), daemon=True)
+        thread.start()
+        return True
+
+    def is_loading(self) -> bool:
+        """
+        Whether a page is being loaded.
+        """
+        return self._loading
+
+    def is_finished(self) -> bool:
+        """
+        Whether all bars in database have been loaded.
+        """
+        return self._finished
+
+    def reset(self) -> None:
+        """
+        Allow loading older pages again, after bars loaded are dropped.
+        """
+        self._finished = False
+
+    def _run_older(self, dt: datetime) -> None:
+        """
+        Load page of bars before datetime in background thread.
+        """
+        try:
+            end: datetime = to_db_datetime(dt) - timedelta(microseconds=1)
+            bars: List[BarData] = self._load_page(end)
+        except Exception:
+            self._loading = False
+            raise
+
+        if not bars:
+            self._finished = True
+
+        self.signal_page.emit(bars)
+
+    def _process_page(self, bars: List[BarData]) -> None:
+        """
+        Page of bars received in GUI thread.
+        """
+        self._loading = False
+
+    def _load_page(self, end: datetime) -> List[BarData]:
+        """
+        Load at most page_size bars until end.
+
+        Datetime span to query starts with page size and is doubled until
+        enough bars are found or the start of data in database is reached.
+        """
+        start_limit: datetime = self._get_data_start()
+        if start_limit and end < start_limit:
+            return []
+
+        delta: timedelta = INTERVAL_DELTA_MAP.get(self.interval, timedelta(minutes=1))
+        span: timedelta = delta * self.page_size
+        bars: List[BarData] = []
+
+        for _ in range(MAX_EXPAND_COUNT):
+            start: datetime = end - span
+            if start_limit and start < start_limit:
+                start = start_limit
+
+            bars = self._load_bars(start, end)
+
+            if len(bars) >= self.page_size or (start_limit and start <= start_limit):
+                break
+
+            span *= 2
+
+        return bars[-self.page_size:]
+
+    def _load_bars(self, start: datetime, end: datetime) -> List[BarData]:
+        """
+        Load bars within datetime range from database.
+        """
+        if not self._database:
+            self._database = get_database()
+
+        return self._database.load_bar_data(
+            self.symbol,
+            self.exchange,
+            self.interval,
+            start,
+            end
+        )
+
+    def _get_data_start(self) -> datetime:
+        """
+        Get datetime of the first bar in database.
+        """
+        if self._start:
+            return self._start
+
+        if not self._database:
+            self._database = get_database()
+
+        overviews: List[BarOverview] = self._database.get_bar_overview()
+        for overview in overviews:
+            if (
+                overview.symbol == self.symbol
+                and overview.exchange == self.exchange
+                and overview.interval == self.interval
+            ):
+                self._start = to_db_datetime(overview.start)
+                break
+
+        return self._start
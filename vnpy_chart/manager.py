@@ -1,171 +1,936 @@
-from typing import Dict, List, Tuple
-from datetime import datetime
-from _collections_abc import dict_keys
+from typing import Callable, Dict, List, Sequence, Tuple
+from datetime import datetime, tzinfo
+
+import numpy as np
 
 from vnpy.trader.object import BarData
+from vnpy.trader.constant import Exchange, Interval
+
+from .base import to_int, to_ns, to_ns_array, from_ns
+from .range_index import RangeIndex
+from .pyramid import BarPyramid, MERGED_FIELDS
+from .annotation import AnnotationStore
+from .storage import BarFile
+
+
+PRICE_FIELDS: Tuple[str, ...] = (
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+)
+
+VALUE_FIELDS: Tuple[str, ...] = PRICE_FIELDS + (
+    "volume",
+    "turnover",
+    "open_interest",
+)
 
-from .base import to_int
+MIN_CAPACITY = 1024
+
+# Share of max_bars evicted at once when the limit is exceeded
+EVICT_RATIO = 0.125
+
+# Tag of icons converted from BarData.extra["icons"]
+EXTRA_TAG = "extra"
 
 
 class BarManager:
-    """"""
+    """
+    Columnar storage of bar data.
+
+    Every field of BarData is kept in a contiguous numpy array, datetime
+    is stored as int64 nanoseconds. BarData objects are only created when
+    requested by get_bar.
+
+    If max_bars is given, the oldest bars are evicted in bulk once there are
+    more bars than that. Arrays work as a sliding window, evicted bars are
+    skipped by moving the head and the room is reused after compaction.
 
-    def __init__(self) -> None:
+    Indicator line series are kept as extra columns named by label, NaN for
+    bars without value. Lines marked in BarData.extra["lines"] are converted
+    into line series when bars are updated.
+
+    Icons are kept in an annotation store by datetime. Icons marked in
+    BarData.extra["icons"] are converted with EXTRA_TAG, and replaced when
+    the same bar is updated again.
+
+    Listeners added by add_listener are called with (start, end, shift) after
+    bars are changed, the same as returned by update_history.
+    """
+
+    def __init__(self, max_bars: int = None) -> None:
         """"""
-        self._bars: Dict[datetime, BarData] = {}
-        self._datetime_index_map: Dict[datetime, int] = {}
-        self._index_datetime_map: Dict[int, datetime] = {}
+        self._max_bars: int = max_bars
+
+        self._count: int = 0
+        self._capacity: int = 0
+        self._head: int = 0                 # Position of the first bar in arrays
+
+        self._datetimes: np.ndarray = np.empty(0, dtype=np.int64)
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.empty(0, dtype=np.float64) for name in VALUE_FIELDS
+        }
+
+        # Range extremum index of columns used by y-axis range
+        self._range_indexes: Dict[str, RangeIndex] = {
+            "high_price": RangeIndex(np.maximum),
+            "low_price": RangeIndex(np.minimum),
+            "volume": RangeIndex(np.maximum),
+        }
+
+        # Merged bars for drawing when zoomed out
+        self._pyramid: BarPyramid = BarPyramid(self._get_column)
+
+        # Color and width of line series, keyed by label
+        self._line_styles: Dict[str, Tuple[object, int]] = {}
 
-        self._price_ranges: Dict[Tuple[int, int], Tuple[float, float]] = {}
-        self._volume_ranges: Dict[Tuple[int, int], Tuple[float, float]] = {}
+        # Sparse storage of BarData.extra, keyed by datetime in nanoseconds
+        self._extras: Dict[int, dict] = {}
 
-    def update_history(self, history: List[BarData]) -> None:
+        self._annotations: AnnotationStore = AnnotationStore()
+
+        self._listeners: List[Callable[[int, int, int], None]] = []
+
+        # Shared fields of bars, taken from the latest bar received
+        self._symbol: str = ""
+        self._exchange: Exchange = None
+        self._interval: Interval = None
+        self._gateway_name: str = ""
+        self._tzinfo: tzinfo = None
+
+    def update_history(self, history: List[BarData], retain: bool = True) -> Tuple[int, int, int]:
         """
         Update a list of bar data.
+
+        Return (start, end, shift): bars within index range [start, end) are
+        new or changed, indexes of bars existed before are moved by shift.
+
+        If retain is False, the oldest bars are not evicted for max_bars,
+        which is used for older history loaded on purpose.
         """
-        # Put all new bars into dict
-        for bar in history:
-            self._bars[bar.datetime] = bar
+        if not history:
+            return 0, 0, 0
+
+        self._update_meta(history[0])
+        self._update_meta(history[-1])
+
+        datetimes, columns = self._to_arrays(history)
 
-        # Sort bars dict according to bar.datetime
-        self._bars = dict(sorted(self._bars.items(), key=lambda tp: tp[0]))
+        # Sort new bars if necessary, the last one wins for same datetime
+        if len(datetimes) > 1 and (datetimes[1:] <= datetimes[:-1]).any():
+            order: np.ndarray = np.argsort(datetimes, kind="stable")
+            datetimes = datetimes[order]
 
-        # Update map relationiship
-        ix_list: range = range(len(self._bars))
-        dt_list: dict_keys = self._bars.keys()
+            keep: np.ndarray = np.ones(len(datetimes), dtype=bool)
+            keep[:-1] = datetimes[:-1] != datetimes[1:]
 
-        self._datetime_index_map = dict(zip(dt_list, ix_list))
-        self._index_datetime_map = dict(zip(ix_list, dt_list))
+            datetimes = datetimes[keep]
+            order = order[keep]
+            for name, values in columns.items():
+                columns[name] = values[order]
 
-        # Clear data range cache
-        self._clear_cache()
+        start, end, shift = self._merge(datetimes, columns)
+        if retain:
+            start, end, shift = self._apply_retention(start, end, shift)
+        return self._apply_change(start, end, shift)
 
-    def update_bar(self, bar: BarData) -> None:
+    def update_bar(self, bar: BarData) -> Tuple[int, int, int]:
         """
         Update one single bar data.
+
+        Return value is the same as update_history.
         """
-        dt: datetime = bar.datetime
+        dt: int = to_ns(bar.datetime)
+
+        # Timezone is taken from the first bar, so meta is updated before
+        # the new bar is counted
+        self._update_meta(bar)
+
+        # Check the last bar first, which is updated most of the time
+        if self._count and dt == self._datetimes[self._head + self._count - 1]:
+            ix: int = self._count - 1
+            added: bool = False
+        elif not self._count or dt > self._datetimes[self._head + self._count - 1]:
+            ix: int = self._count
+            added: bool = True
+            self._reserve_tail(1)
+            self._count += 1
+
+            self._datetimes[self._head + ix] = dt
+        else:
+            return self.update_history([bar])
+
+        pos: int = self._head + ix
+        for name in VALUE_FIELDS:
+            self._columns[name][pos] = getattr(bar, name)
+
+        # Line values not given are kept, or left empty for new bar
+        lines: Dict[str, float] = self._get_line_values(bar)
+        for label in self._line_styles:
+            if label in lines:
+                self._columns[label][pos] = lines[label]
+            elif added:
+                self._columns[label][pos] = np.nan
 
-        if dt not in self._datetime_index_map:
-            ix: int = len(self._bars)
-            self._datetime_index_map[dt] = ix
-            self._index_datetime_map[ix] = dt
+        self._update_range_indexes(ix, ix + 1)
+        self._update_extra(dt, bar.extra)
+        self._update_icons(np.array([dt], dtype=np.int64), [bar])
 
-        self._bars[dt] = bar
+        return self._apply_change(*self._apply_retention(ix, ix + 1, 0))
+
+    def evict(self, size: int) -> Tuple[int, int, int]:
+        """
+        Remove the oldest bars.
+
+        Return value is the same as update_history, indexes of remaining bars
+        are moved by -size.
+        """
+        size = min(size, self._count)
+        if size <= 0:
+            return 0, 0, 0
 
-        self._clear_cache()
+        self._evict(size)
+        return self._apply_change(0, 0, -size)
+
+    def _evict(self, size: int) -> None:
+        """
+        Remove the oldest bars without notifying listeners.
+        """
+        self._head += size
+        self._count -= size
+
+        # Range index needs no update, since blocks follow storage position
+        if self._extras:
+            first: int = int(self._datetimes[self._head]) if self._count else 0
+            self._extras = {dt: extra for dt, extra in self._extras.items() if dt >= first}
+
+        if self._count:
+            self._annotations.remove_before(int(self._datetimes[self._head]))
+
+    def attach_file(self, path: str) -> Tuple[int, int, int]:
+        """
+        Use bar data file written by write_bar_file as storage.
+
+        Existing data is cleared. Columns are memory mapped from file, only
+        the parts accessed are loaded into memory. Bars updated later are kept
+        in memory and never written into file.
+
+        Return value is the same as update_history.
+        """
+        bar_file: BarFile = BarFile(path)
+
+        self.clear_all()
+
+        self._datetimes = bar_file.columns["datetime"]
+        for name in self._columns:
+            self._columns[name] = bar_file.columns[name]
+
+        self._count = bar_file.count
+        self._capacity = bar_file.capacity
+
+        self._symbol = bar_file.symbol
+        self._exchange = bar_file.exchange
+        self._interval = bar_file.interval
+        self._gateway_name = bar_file.gateway_name
+        self._tzinfo = bar_file.tzinfo
+
+        for name, index in self._range_indexes.items():
+            index.set_blocks(bar_file.blocks[name], self._capacity)
+
+        return self._apply_change(*self._apply_retention(0, self._count, 0))
+
+    def add_line_series(self, label: str, values: np.ndarray, color: object, width: int = 1) -> None:
+        """
+        Add indicator line series, or replace values of the existing one.
+
+        values are aligned to the latest bars if there are fewer values than
+        bars, NaN means no value for the bar.
+        """
+        if label in VALUE_FIELDS or label == "datetime":
+            raise ValueError(f"Label of line series can not be {label}")
+
+        values: np.ndarray = np.asarray(values, dtype=np.float64)
+        if len(values) > self._count:
+            values = values[len(values) - self._count:]
+
+        self._add_line_column(label, color, width)
+
+        column: np.ndarray = self._get_column(label)
+        column[:self._count - len(values)] = np.nan
+        column[self._count - len(values):] = values
+
+        self._notify(0, self._count, 0)
+
+    def update_line_series(self, label: str, value: float, ix: int = None) -> None:
+        """
+        Update value of line series in place, for the last bar by default.
+        """
+        if ix is None:
+            ix = self._count - 1
+
+        if ix < 0 or ix >= self._count:
+            return
+
+        self._columns[label][self._head + ix] = value
+
+        self._notify(ix, ix + 1, 0)
+
+    def remove_line_series(self, label: str) -> None:
+        """
+        Remove indicator line series.
+        """
+        if label in self._line_styles:
+            self._line_styles.pop(label)
+            self._columns.pop(label)
+
+            self._notify(0, self._count, 0)
+
+    def add_listener(self, listener: Callable[[int, int, int], None]) -> None:
+        """
+        Add function called with (start, end, shift) after bars are changed.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[int, int, int], None]) -> None:
+        """
+        Remove function added by add_listener.
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def get_line_styles(self) -> Dict[str, Tuple[object, int]]:
+        """
+        Get (color, width) of all line series, keyed by label.
+        """
+        return self._line_styles
+
+    def get_max_bars(self) -> int:
+        """
+        Get the maximum number of bars kept, None for no limit.
+        """
+        return self._max_bars
 
     def get_count(self) -> int:
         """
         Get total number of bars.
         """
-        return len(self._bars)
+        return self._count
+
+    def get_tzinfo(self) -> tzinfo:
+        """
+        Get timezone of bar datetimes, None for naive datetimes.
+        """
+        return self._tzinfo
 
     def get_index(self, dt: datetime) -> int:
         """
         Get index with datetime.
         """
-        return self._datetime_index_map.get(dt, None)
+        value: int = to_ns(dt)
+        datetimes: np.ndarray = self._get_column("datetime")
+
+        ix: int = int(np.searchsorted(datetimes, value))
+        if ix == self._count or datetimes[ix] != value:
+            return None
+
+        return ix
+
+    def get_nearest_index(self, dt: datetime) -> int:
+        """
+        Get index of the last bar at or before datetime.
+
+        Return None if datetime is earlier than all bars.
+        """
+        datetimes: np.ndarray = self._get_column("datetime")
+
+        ix: int = int(np.searchsorted(datetimes, to_ns(dt), side="right")) - 1
+        if ix < 0:
+            return None
+
+        return ix
+
+    def get_index_range(self, start: datetime, end: datetime) -> Tuple[int, int]:
+        """
+        Get index range (min_ix, max_ix) of bars between start and end, both included.
+
+        Return None if there is no bar within the datetime range.
+        """
+        datetimes: np.ndarray = self._get_column("datetime")
+
+        min_ix: int = int(np.searchsorted(datetimes, to_ns(start), side="left"))
+        max_ix: int = int(np.searchsorted(datetimes, to_ns(end), side="right")) - 1
+        if min_ix > max_ix:
+            return None
+
+        return min_ix, max_ix
+
+    def get_indexes(self, dts: Sequence[datetime] | np.ndarray, nearest: bool = False) -> np.ndarray:
+        """
+        Get indexes of many datetimes at once.
+
+        dts can be a sequence of datetime, or numpy array of datetime64 or
+        int64 nanoseconds. Datetime not found is given -1, or the index of the
+        last bar before it if nearest is True.
+        """
+        values: np.ndarray = to_ns_array(dts)
+        datetimes: np.ndarray = self._get_column("datetime")
+
+        if not self._count:
+            return np.full(len(values), -1, dtype=np.int64)
+
+        if nearest:
+            return np.searchsorted(datetimes, values, side="right") - 1
+
+        ixs: np.ndarray = np.searchsorted(datetimes, values)
+        found: np.ndarray = datetimes[np.minimum(ixs, self._count - 1)] == values
+        return np.where(found & (ixs < self._count), ixs, -1)
 
     def get_datetime(self, ix: float) -> datetime:
         """
         Get datetime with index.
         """
         ix: int = to_int(ix)
-        return self._index_datetime_map.get(ix, None)
+        if ix < 0 or ix >= self._count:
+            return None
+
+        return from_ns(int(self._datetimes[self._head + ix]), self._tzinfo)
 
     def get_bar(self, ix: float) -> BarData:
         """
         Get bar data with index.
         """
         ix: int = to_int(ix)
-        dt: datetime = self._index_datetime_map.get(ix, None)
-        if not dt:
+        if ix < 0 or ix >= self._count:
             return None
 
-        return self._bars[dt]
+        pos: int = self._head + ix
+        dt: int = int(self._datetimes[pos])
+        columns: Dict[str, np.ndarray] = self._columns
+
+        bar: BarData = BarData(
+            symbol=self._symbol,
+            exchange=self._exchange,
+            datetime=from_ns(dt, self._tzinfo),
+            interval=self._interval,
+            volume=float(columns["volume"][pos]),
+            turnover=float(columns["turnover"][pos]),
+            open_interest=float(columns["open_interest"][pos]),
+            open_price=float(columns["open_price"][pos]),
+            high_price=float(columns["high_price"][pos]),
+            low_price=float(columns["low_price"][pos]),
+            close_price=float(columns["close_price"][pos]),
+            gateway_name=self._gateway_name
+        )
+        bar.extra = self._extras.get(dt, None)
+
+        return bar
 
     def get_all_bars(self) -> List[BarData]:
         """
         Get all bar data.
         """
-        return list(self._bars.values())
+        return [self.get_bar(ix) for ix in range(self._count)]
+
+    def add_icons(
+        self,
+        icon: object,
+        dts: Sequence[datetime] | np.ndarray,
+        values: np.ndarray,
+        tag: str = ""
+    ) -> None:
+        """
+        Add many icons at once, with y values at datetimes of bars.
 
-    def get_price_range(self, min_ix: float = None, max_ix: float = None) -> Tuple[float, float]:
+        dts can be a sequence of datetime, or numpy array of datetime64 or
+        int64 nanoseconds. Icons can be removed later by tag.
         """
-        Get price range to show within given index range.
+        self._annotations.add(icon, to_ns_array(dts), values, tag)
+
+    def remove_icons(self, tag: str, icon: object = None) -> None:
         """
-        if not self._bars:
-            return 0, 1
+        Remove all icons of tag, only of given icon if specified.
+        """
+        self._annotations.remove(tag, icon)
 
-        if not min_ix:
-            min_ix: int = 0
-            max_ix: int = len(self._bars) - 1
-        else:
-            min_ix: int = to_int(min_ix)
-            max_ix: int = to_int(max_ix)
-            max_ix = min(max_ix, self.get_count())
+    def get_icons(
+        self,
+        min_ix: int = None,
+        max_ix: int = None
+    ) -> Dict[object, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Get (indexes, values, tags) of each icon within index range [min_ix, max_ix].
+
+        Icons at datetime without bar are skipped.
+        """
+        if not self._count:
+            return {}
+
+        min_ix, max_ix = self._get_ix_range(min_ix, max_ix)
+        datetimes: np.ndarray = self._get_column("datetime")
+
+        result: Dict[object, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for icon, (dts, values, tags) in self._annotations.query(
+            int(datetimes[min_ix]), int(datetimes[max_ix])
+        ).items():
+            ixs: np.ndarray = np.searchsorted(datetimes, dts)
+            found: np.ndarray = datetimes[np.minimum(ixs, self._count - 1)] == dts
+            if not found.all():
+                ixs, values, tags = ixs[found], values[found], tags[found]
+
+            result[icon] = (ixs, values, self._annotations.get_tag_names(tags))
+
+        return result
+
+    def get_extra(self, ix: int) -> dict:
+        """
+        Get extra of bar data with index, without creating BarData.
+        """
+        if ix < 0 or ix >= self._count:
+            return None
+
+        return self._extras.get(int(self._datetimes[self._head + ix]), None)
+
+    def get_array(self, name: str, min_ix: int = None, max_ix: int = None) -> np.ndarray:
+        """
+        Get read-only view of one column within given index range.
+
+        Datetime column is returned as int64 nanoseconds.
+        """
+        if min_ix is None:
+            min_ix = 0
+        if max_ix is None:
+            max_ix = self._count - 1
 
-        buf: tuple = self._price_ranges.get((min_ix, max_ix), None)
-        if buf:
-            return buf
+        min_ix = max(0, min_ix)
+        max_ix = min(max_ix, self._count - 1)
 
-        bar_list: List[BarData] = list(self._bars.values())[min_ix:max_ix + 1]
-        first_bar: BarData = bar_list[0]
-        max_price: float = first_bar.high_price
-        min_price: float = first_bar.low_price
+        view: np.ndarray = self._get_column(name)[min_ix:max_ix + 1]
+        view.flags.writeable = False
+        return view
+
+    def get_price_range(self, min_ix: float = None, max_ix: float = None) -> Tuple[float, float]:
+        """
+        Get price range to show within given index range.
+        """
+        if not self._count:
+            return 0, 1
 
-        for bar in bar_list[1:]:
-            max_price = max(max_price, bar.high_price)
-            min_price = min(min_price, bar.low_price)
+        min_ix, max_ix = self._get_ix_range(min_ix, max_ix)
 
-        self._price_ranges[(min_ix, max_ix)] = (min_price, max_price)
+        max_price: float = self._query_range("high_price", min_ix, max_ix)
+        min_price: float = self._query_range("low_price", min_ix, max_ix)
         return min_price, max_price
 
     def get_volume_range(self, min_ix: float = None, max_ix: float = None) -> Tuple[float, float]:
         """
         Get volume range to show within given index range.
         """
-        if not self._bars:
+        if not self._count:
             return 0, 1
 
-        if not min_ix:
+        min_ix, max_ix = self._get_ix_range(min_ix, max_ix)
+
+        max_volume: float = self._query_range("volume", min_ix, max_ix)
+        min_volume: float = 0
+        return min_volume, max_volume
+
+    def get_lod_bars(self, level: int, min_ix: int, max_ix: int) -> Tuple[int, Dict[str, np.ndarray]]:
+        """
+        Get bars merged by every 2 ** level bars within index range [min_ix, max_ix].
+
+        Return index of the first merged bar and columns of merged bars, the
+        merged bar of index i is made of bars from i * 2 ** level.
+        """
+        if not self._count:
+            return 0, {name: np.empty(0, dtype=np.float64) for name in MERGED_FIELDS}
+
+        min_ix, max_ix = self._get_ix_range(min_ix, max_ix)
+        return self._pyramid.get_bars(level, min_ix, max_ix)
+
+    def _query_range(self, name: str, min_ix: int, max_ix: int) -> float:
+        """
+        Query extremum of column within index range with range index.
+        """
+        index: RangeIndex = self._range_indexes[name]
+        return index.query(self._get_column(name), min_ix, max_ix, self._head)
+
+    def _get_ix_range(self, min_ix: float, max_ix: float) -> Tuple[int, int]:
+        """
+        Convert index range of query into valid integer index range.
+        """
+        if min_ix is None:
             min_ix: int = 0
-            max_ix: int = len(self._bars) - 1
         else:
-            min_ix: int = to_int(min_ix)
-            max_ix: int = to_int(max_ix)
-            max_ix = min(max_ix, self.get_count())
+            min_ix: int = min(max(to_int(min_ix), 0), self._count - 1)
+
+        if max_ix is None:
+            max_ix: int = self._count - 1
+        else:
+            max_ix: int = min(to_int(max_ix), self._count - 1)
+
+        return min_ix, max(min_ix, max_ix)
 
-        buf: tuple = self._volume_ranges.get((min_ix, max_ix), None)
-        if buf:
-            return buf
+    def _apply_retention(self, start: int, end: int, shift: int) -> Tuple[int, int, int]:
+        """
+        Evict the oldest bars if there are more than max_bars.
 
-        bar_list: List[BarData] = list(self._bars.values())[min_ix:max_ix + 1]
+        Change range returned by update is converted with indexes after eviction.
+        """
+        if not self._max_bars or self._count <= self._max_bars:
+            return start, end, shift
 
-        first_bar: BarData = bar_list[0]
-        max_volume = first_bar.volume
-        min_volume = 0
+        size: int = self._count - self._max_bars + int(self._max_bars * EVICT_RATIO)
+        size = min(size, self._count - 1)
+        self._evict(size)
 
-        for bar in bar_list[1:]:
-            max_volume = max(max_volume, bar.volume)
+        return max(start - size, 0), max(end - size, 0), shift - size
 
-        self._volume_ranges[(min_ix, max_ix)] = (min_volume, max_volume)
-        return min_volume, max_volume
+    def _apply_change(self, start: int, end: int, shift: int) -> Tuple[int, int, int]:
+        """
+        Update merged bars and notify listeners with change range, which is
+        returned as it is.
+        """
+        self._pyramid.update(start, end, shift)
+        self._notify(start, end, shift)
+        return start, end, shift
+
+    def _notify(self, start: int, end: int, shift: int) -> None:
+        """
+        Call listeners with change range.
+        """
+        for listener in self._listeners:
+            listener(start, end, shift)
 
-    def _clear_cache(self) -> None:
+    def _get_column(self, name: str) -> np.ndarray:
         """
-        Clear cached range data.
+        Get view of column with valid data only.
         """
-        self._price_ranges.clear()
-        self._volume_ranges.clear()
+        if name == "datetime":
+            column: np.ndarray = self._datetimes
+        else:
+            column: np.ndarray = self._columns[name]
+
+        return column[self._head:self._head + self._count]
+
+    def _merge(self, datetimes: np.ndarray, columns: Dict[str, np.ndarray]) -> Tuple[int, int, int]:
+        """
+        Merge sorted new bars into existing data.
+        """
+        count: int = self._count
+        if not count:
+            return self._append(datetimes, columns)
+
+        existing: np.ndarray = self._get_column("datetime")
+
+        # Newer than all existing bars, which is the most common case
+        if datetimes[0] > existing[-1]:
+            return self._append(datetimes, columns)
+
+        # Older than all existing bars
+        if datetimes[-1] < existing[0]:
+            return self._prepend(datetimes, columns)
+
+        pos: np.ndarray = np.searchsorted(existing, datetimes)
+        matched: np.ndarray = existing[np.minimum(pos, count - 1)] == datetimes
+
+        # Overwrite existing bars in place
+        if matched.any():
+            replaced: np.ndarray = pos[matched]
+            for name, column in self._columns.items():
+                values: np.ndarray = columns[name][matched]
+
+                # Keep line values not given
+                if name in self._line_styles:
+                    values = np.where(np.isnan(values), column[self._head + replaced], values)
+
+                column[self._head + replaced] = values
+            self._update_range_indexes(int(replaced[0]), int(replaced[-1]) + 1)
+
+        start: int = int(pos[0])
+        end: int = int(pos[-1]) + 1
+
+        added: np.ndarray = ~matched
+        if not added.any():
+            return start, end, 0
+
+        datetimes = datetimes[added]
+        columns = {name: values[added] for name, values in columns.items()}
+        inserted: np.ndarray = pos[added]
+
+        if inserted[0] == count:
+            self._append(datetimes, columns)
+            return start, self._count, 0
+
+        if inserted[-1] == 0:
+            self._prepend(datetimes, columns)
+            return 0, end + len(datetimes), len(datetimes)
+
+        self._insert(inserted, datetimes, columns)
+        return start, self._count, 0
+
+    def _append(self, datetimes: np.ndarray, columns: Dict[str, np.ndarray]) -> Tuple[int, int, int]:
+        """
+        Add sorted new bars after existing data.
+        """
+        start: int = self._count
+        size: int = len(datetimes)
+
+        self._reserve_tail(size)
+        pos: int = self._head + start
+
+        self._datetimes[pos:pos + size] = datetimes
+        for name, column in self._columns.items():
+            column[pos:pos + size] = columns[name]
+
+        self._count += size
+
+        self._update_range_indexes(start, self._count)
+        return start, self._count, 0
+
+    def _prepend(self, datetimes: np.ndarray, columns: Dict[str, np.ndarray]) -> Tuple[int, int, int]:
+        """
+        Add sorted new bars before existing data.
+        """
+        size: int = len(datetimes)
+
+        self._reserve_head(size)
+        self._head -= size
+        pos: int = self._head
+
+        self._datetimes[pos:pos + size] = datetimes
+        for name, column in self._columns.items():
+            column[pos:pos + size] = columns[name]
+
+        self._count += size
+
+        self._update_range_indexes(0, size)
+        return 0, size, size
+
+    def _insert(
+        self,
+        inserted: np.ndarray,
+        datetimes: np.ndarray,
+        columns: Dict[str, np.ndarray]
+    ) -> None:
+        """
+        Insert sorted new bars into the middle of existing data.
+        """
+        merged_datetimes: np.ndarray = np.insert(self._get_column("datetime"), inserted, datetimes)
+        merged_columns: Dict[str, np.ndarray] = {
+            name: np.insert(self._get_column(name), inserted, values)
+            for name, values in columns.items()
+        }
+
+        count: int = len(merged_datetimes)
+        capacity: int = self._get_capacity(self._head + count)
+
+        self._datetimes = np.zeros(capacity, dtype=np.int64)
+        self._datetimes[self._head:self._head + count] = merged_datetimes
+
+        for name, values in merged_columns.items():
+            column: np.ndarray = np.zeros(capacity, dtype=np.float64)
+            column[self._head:self._head + count] = values
+            self._columns[name] = column
+
+        self._count = count
+        self._capacity = capacity
+
+        self._rebuild_range_indexes()
+
+    def _update_range_indexes(self, start: int, end: int) -> None:
+        """
+        Update range indexes after bars within [start, end) changed.
+        """
+        for name, index in self._range_indexes.items():
+            index.update(self._get_column(name), start, end, self._head)
+
+    def _rebuild_range_indexes(self) -> None:
+        """
+        Rebuild range indexes after storage layout changed.
+        """
+        for name, index in self._range_indexes.items():
+            index.rebuild(self._get_column(name), self._head)
+
+    def _to_arrays(self, history: List[BarData]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Convert list of bar data into column arrays.
+        """
+        datetimes: np.ndarray = np.fromiter(
+            (to_ns(bar.datetime) for bar in history),
+            dtype=np.int64,
+            count=len(history)
+        )
+
+        columns: Dict[str, np.ndarray] = {}
+        for name in VALUE_FIELDS:
+            columns[name] = np.fromiter(
+                (getattr(bar, name) for bar in history),
+                dtype=np.float64,
+                count=len(history)
+            )
+
+        lines: List[Dict[str, float]] = [self._get_line_values(bar) for bar in history]
+        for label in self._line_styles:
+            if any(label in values for values in lines):
+                columns[label] = np.fromiter(
+                    (values.get(label, np.nan) for values in lines),
+                    dtype=np.float64,
+                    count=len(history)
+                )
+            else:
+                columns[label] = np.full(len(history), np.nan)
+
+        for dt, bar in zip(datetimes.tolist(), history):
+            self._update_extra(dt, bar.extra)
+
+        self._update_icons(np.unique(datetimes), history)
+
+        return datetimes, columns
+
+    def _update_icons(self, datetimes: np.ndarray, history: List[BarData]) -> None:
+        """
+        Replace icons converted from extra of bars at sorted datetimes.
+        """
+        self._annotations.remove_at(EXTRA_TAG, datetimes)
+
+        icons: Dict[object, Tuple[List[int], List[float]]] = {}
+        for bar in history:
+            if not bar.extra or not bar.extra.get("icons"):
+                continue
+
+            dt: int = to_ns(bar.datetime)
+            for icon, value in bar.extra["icons"]:
+                dts, values = icons.setdefault(icon, ([], []))
+                dts.append(dt)
+                values.append(value)
+
+        for icon, (dts, values) in icons.items():
+            self._annotations.add(icon, dts, values, EXTRA_TAG)
+
+    def _get_line_values(self, bar: BarData) -> Dict[str, float]:
+        """
+        Get line values marked in extra of bar data, line series not existed are added.
+        """
+        if not bar.extra or not bar.extra.get("lines"):
+            return {}
+
+        values: Dict[str, float] = {}
+        for label, value, color, width in bar.extra["lines"]:
+            if label not in self._line_styles:
+                self._add_line_column(label, color, width)
+            values[label] = value
+
+        return values
+
+    def _add_line_column(self, label: str, color: object, width: int) -> None:
+        """
+        Add column of line series with all values empty, if not exists.
+        """
+        self._line_styles[label] = (color, width)
+
+        if label not in self._columns:
+            self._columns[label] = np.full(self._capacity, np.nan)
+
+    def _update_meta(self, bar: BarData) -> None:
+        """
+        Update shared fields with bar data.
+        """
+        self._symbol = bar.symbol
+        self._exchange = bar.exchange
+        self._interval = bar.interval
+        self._gateway_name = bar.gateway_name
+
+        if not self._count:
+            self._tzinfo = bar.datetime.tzinfo
+
+    def _update_extra(self, dt: int, extra: dict) -> None:
+        """
+        Keep extra of bar data, only if it is not empty.
+
+        Lines and icons are not kept since they are converted.
+        """
+        if extra and ("lines" in extra or "icons" in extra):
+            extra = {key: value for key, value in extra.items() if key not in ("lines", "icons")}
+
+        if extra:
+            self._extras[dt] = extra
+        else:
+            self._extras.pop(dt, None)
+
+    def _get_capacity(self, size: int) -> int:
+        """
+        Get capacity needed for given size by doubling current capacity.
+        """
+        capacity: int = max(self._capacity, MIN_CAPACITY)
+        while capacity < size:
+            capacity *= 2
+        return capacity
+
+    def _reserve_tail(self, size: int) -> None:
+        """
+        Make sure there is enough room for given number of bars after data.
+        """
+        end: int = self._head + self._count + size
+        if end <= self._capacity:
+            return
+
+        # Reuse room left by evicted bars before growing
+        if self._head >= self._count + size:
+            self._reallocate(0, self._capacity)
+        else:
+            self._reallocate(self._head, self._get_capacity(end))
+
+    def _reserve_head(self, size: int) -> None:
+        """
+        Make sure there is enough room for given number of bars before data.
+
+        Room left before data grows with data size, to keep prepending amortized.
+        """
+        if size <= self._head:
+            return
+
+        head: int = size + self._count
+        tail: int = self._capacity - self._head - self._count
+        self._reallocate(head, self._get_capacity(head + self._count + tail))
+
+    def _reallocate(self, head: int, capacity: int) -> None:
+        """
+        Move data into new arrays of capacity, starting from head.
+        """
+        start: int = self._head
+        end: int = self._head + self._count
+
+        datetimes: np.ndarray = np.zeros(capacity, dtype=np.int64)
+        datetimes[head:head + self._count] = self._datetimes[start:end]
+        self._datetimes = datetimes
+
+        for name, column in self._columns.items():
+            values: np.ndarray = np.zeros(capacity, dtype=np.float64)
+            values[head:head + self._count] = column[start:end]
+            self._columns[name] = values
+
+        self._head = head
+        self._capacity = capacity
+
+        self._rebuild_range_indexes()
 
     def clear_all(self) -> None:
         """
         Clear all data in manager.
         """
-        self._bars.clear()
-        self._datetime_index_map.clear()
-        self._index_datetime_map.clear()
+        self._count = 0
+        self._capacity = 0
+        self._head = 0
+
+        self._datetimes = np.empty(0, dtype=np.int64)
+        self._columns = {name: np.empty(0, dtype=np.float64) for name in VALUE_FIELDS}
+
+        self._line_styles.clear()
+        self._extras.clear()
+        self._annotations.clear()
 
-        self._clear_cache()
+        for index in self._range_indexes.values():
+            index.clear()
+        self._pyramid.clear()
+        self._tzinfo = None
@@ -0,0 +1,155 @@
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+
+LOD_FIELDS: Tuple[str, ...] = (
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+    "volume",
+)
+
+# Columns of merged bars, max volume is for drawing merged volume bars
+MERGED_FIELDS: Tuple[str, ...] = LOD_FIELDS + ("max_volume",)
+
+CHUNK_SIZE = 1024           # Merged bars in one chunk
+MAX_CHUNK_COUNT = 256       # Chunks kept in memory, older ones are dropped
+
+
+class BarPyramid:
+    """
+    Level-of-detail pyramid of merged bars.
+
+    Merged bar of level k is made of 2 ** k bars, starting from index which
+    is a multiple of 2 ** k. Open is of the first bar, close is of the last
+    bar, high and low are extremums and volume is summed. Max volume of bars
+    is kept as well.
+
+    Merged bars are calculated in chunks of CHUNK_SIZE only when requested,
+    chunks are kept and updated incrementally when bars are changed.
+    """
+
+    def __init__(self, get_column: Callable[[str], np.ndarray]) -> None:
+        """
+        get_column returns array of valid bar data with field name.
+        """
+        self._get_column: Callable[[str], np.ndarray] = get_column
+        self._chunks: OrderedDict[Tuple[int, int], Dict[str, np.ndarray]] = OrderedDict()
+
+    def get_bars(self, level: int, min_ix: int, max_ix: int) -> Tuple[int, Dict[str, np.ndarray]]:
+        """
+        Get merged bars of level covering index range [min_ix, max_ix].
+
+        Return index of the first merged bar and columns of merged bars.
+        """
+        first: int = min_ix >> level
+        last: int = max_ix >> level
+
+        parts: List[Dict[str, np.ndarray]] = []
+
+        for chunk in range(first // CHUNK_SIZE, last // CHUNK_SIZE + 1):
+            data: Dict[str, np.ndarray] = self._get_chunk(level, chunk)
+
+            start: int = max(first - chunk * CHUNK_SIZE, 0)
+            end: int = last - chunk * CHUNK_SIZE + 1
+            parts.append({name: values[start:end] for name, values in data.items()})
+
+        if len(parts) == 1:
+            return first, parts[0]
+
+        bars: Dict[str, np.ndarray] = {
+            name: np.concatenate([part[name] for part in parts]) for name in MERGED_FIELDS
+        }
+        return first, bars
+
+    def update(self, start: int, end: int, shift: int = 0) -> None:
+        """
+        Update merged bars after bars within [start, end) changed.
+        """
+        if shift:
+            self.clear()
+            return
+
+        if end <= start:
+            return
+
+        for (level, chunk), data in self._chunks.items():
+            size: int = 1 << level
+            chunk_start: int = chunk * CHUNK_SIZE
+            chunk_end: int = chunk_start + CHUNK_SIZE
+
+            first: int = max(start >> level, chunk_start)
+            last: int = min((end - 1) >> level, chunk_end - 1)
+            if first > last:
+                continue
+
+            count: int = len(self._get_column("open_price"))
+            length: int = min(-(-count // size) - chunk_start, CHUNK_SIZE)
+            old_length: int = len(data["open_price"])
+
+            # Extend chunk if new merged bars are added
+            if length > old_length:
+                for name, values in data.items():
+                    data[name] = np.resize(values, length)
+                first = min(first, chunk_start + old_length)
+
+            merged: Dict[str, np.ndarray] = self._merge(level, first, last + 1)
+            for name, values in merged.items():
+                data[name][first - chunk_start:last - chunk_start + 1] = values
+
+    def _get_chunk(self, level: int, chunk: int) -> Dict[str, np.ndarray]:
+        """
+        Get chunk of merged bars, calculate it if not exists.
+        """
+        key: Tuple[int, int] = (level, chunk)
+
+        data: Dict[str, np.ndarray] = self._chunks.get(key, None)
+        if data is not None:
+            self._chunks.move_to_end(key)
+            return data
+
+        count: int = len(self._get_column("open_price"))
+        size: int = 1 << level
+
+        first: int = chunk * CHUNK_SIZE
+        last: int = min(first + CHUNK_SIZE, -(-count // size))
+
+        data = self._merge(level, first, last)
+        self._chunks[key] = data
+
+        if len(self._chunks) > MAX_CHUNK_COUNT:
+            self._chunks.popitem(last=False)
+
+        return data
+
+    def _merge(self, level: int, first: int, last: int) -> Dict[str, np.ndarray]:
+        """
+        Calculate merged bars of level within [first, last) from bar data.
+        """
+        size: int = 1 << level
+        start: int = first * size
+        end: int = min(last * size, len(self._get_column("open_price")))
+
+        if start >= end:
+            return {name: np.empty(0, dtype=np.float64) for name in MERGED_FIELDS}
+
+        starts: np.ndarray = np.arange(0, end - start, size)
+        ends: np.ndarray = np.minimum(starts + size, end - start) - 1
+
+        return {
+            "open_price": self._get_column("open_price")[start:end][starts],
+            "high_price": np.maximum.reduceat(self._get_column("high_price")[start:end], starts),
+            "low_price": np.minimum.reduceat(self._get_column("low_price")[start:end], starts),
+            "close_price": self._get_column("close_price")[start:end][ends],
+            "volume": np.add.reduceat(self._get_column("volume")[start:end], starts),
+            "max_volume": np.maximum.reduceat(self._get_column("volume")[start:end], starts),
+        }
+
+    def clear(self) -> None:
+        """
+        Clear all merged bars.
+        """
+        self._chunks.clear()
@@ -0,0 +1,172 @@
+import numpy as np
+
+
+BLOCK_SIZE = 64
+
+
+class RangeIndex:
+    """
+    Range extremum index over one data column.
+
+    Data is split into blocks of BLOCK_SIZE values, the extremum of each block
+    is kept as a leaf of a segment tree. A query reduces the partial blocks at
+    both ends with numpy and walks the tree for the full blocks in between.
+
+    Blocks are aligned to the position of values within the storage buffer,
+    which is given as offset, so that data added in front of values does not
+    move existing blocks.
+    """
+
+    def __init__(self, func: np.ufunc) -> None:
+        """
+        func should be np.maximum or np.minimum.
+        """
+        self._func: np.ufunc = func
+
+        if func is np.maximum:
+            self._identity: float = -np.inf
+        else:
+            self._identity: float = np.inf
+
+        self._size: int = 0
+        self._block_count: int = 0
+        self._tree: np.ndarray = np.empty(0, dtype=np.float64)
+
+    def rebuild(self, values: np.ndarray, offset: int = 0) -> None:
+        """
+        Build the whole index from values.
+        """
+        first_block: int = offset // BLOCK_SIZE
+        block_count: int = -(-(offset + len(values)) // BLOCK_SIZE)
+
+        size: int = 1
+        while size < block_count:
+            size *= 2
+
+        self._size = size
+        self._block_count = block_count
+        self._tree = np.full(size * 2, self._identity, dtype=np.float64)
+
+        if not len(values):
+            return
+
+        padded: np.ndarray = np.full(
+            (block_count - first_block) * BLOCK_SIZE,
+            self._identity,
+            dtype=np.float64
+        )
+        start: int = offset - first_block * BLOCK_SIZE
+        padded[start:start + len(values)] = values
+
+        self._tree[size + first_block:size + block_count] = self._func.reduce(
+            padded.reshape(-1, BLOCK_SIZE), axis=1
+        )
+
+        self._update_nodes(size + first_block, size + block_count)
+
+    def update(self, values: np.ndarray, start: int, end: int, offset: int = 0) -> None:
+        """
+        Refresh index after values within [start, end) are changed or added.
+        """
+        if end <= start:
+            return
+
+        first_block: int = (start + offset) // BLOCK_SIZE
+        last_block: int = (end - 1 + offset) // BLOCK_SIZE
+
+        if last_block >= self._size:
+            self.rebuild(values, offset)
+            return
+
+        self._block_count = max(self._block_count, last_block + 1)
+
+        for block in range(first_block, last_block + 1):
+            block_start: int = max(block * BLOCK_SIZE - offset, 0)
+            block_end: int = (block + 1) * BLOCK_SIZE - offset
+            self._tree[self._size + block] = self._func.reduce(values[block_start:block_end])
+
+        self._update_nodes(self._size + first_block, self._size + last_block + 1)
+
+    def get_blocks(self) -> np.ndarray:
+        """
+        Get extremums of all blocks, which can be restored with set_blocks.
+        """
+        return self._tree[self._size:self._size + self._block_count].copy()
+
+    def set_blocks(self, blocks: np.ndarray, capacity: int = 0) -> None:
+        """
+        Restore index from extremums of blocks, without scanning values.
+
+        Tree is made large enough for capacity values, to avoid rebuilding
+        when values are added later.
+        """
+        block_count: int = len(blocks)
+
+        size: int = 1
+        while size < max(block_count, -(-capacity // BLOCK_SIZE)):
+            size *= 2
+
+        self._size = size
+        self._block_count = block_count
+        self._tree = np.full(size * 2, self._identity, dtype=np.float64)
+        self._tree[size:size + block_count] = blocks
+
+        self._update_nodes(size, size + block_count)
+
+    def query(self, values: np.ndarray, min_ix: int, max_ix: int, offset: int = 0) -> float:
+        """
+        Get extremum of values within [min_ix, max_ix], both ends included.
+        """
+        first_block: int = (min_ix + offset) // BLOCK_SIZE + 1
+        last_block: int = (max_ix + offset + 1) // BLOCK_SIZE - 1
+
+        # Not a single full block within range
+        if first_block > last_block:
+            return float(self._func.reduce(values[min_ix:max_ix + 1]))
+
+        func: np.ufunc = self._func
+        result: float = func(
+            func.reduce(values[min_ix:first_block * BLOCK_SIZE - offset]),
+            func.reduce(
+                values[(last_block + 1) * BLOCK_SIZE - offset:max_ix + 1],
+                initial=self._identity
+            )
+        )
+
+        tree: np.ndarray = self._tree
+        lo: int = first_block + self._size
+        hi: int = last_block + self._size + 1
+
+        while lo < hi:
+            if lo & 1:
+                result = func(result, tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                result = func(result, tree[hi])
+            lo //= 2
+            hi //= 2
+
+        return float(result)
+
+    def _update_nodes(self, lo: int, hi: int) -> None:
+        """
+        Update parent nodes of leaves within [lo, hi).
+        """
+        tree: np.ndarray = self._tree
+
+        lo //= 2
+        hi = (hi - 1) // 2 + 1
+
+        while lo >= 1 and hi > lo:
+            tree[lo:hi] = self._func(tree[lo * 2:hi * 2:2], tree[lo * 2 + 1:hi * 2:2])
+            lo //= 2
+            hi = (hi - 1) // 2 + 1
+
+    def clear(self) -> None:
+        """
+        Clear all data in index.
+        """
+        self._size = 0
+        self._block_count = 0
+        self._tree = np.empty(0, dtype=np.float64)
@@ -0,0 +1,264 @@
+import json
+from datetime import timedelta, timezone, tzinfo
+from typing import Dict, List, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from vnpy.trader.object import BarData
+from vnpy.trader.constant import Exchange, Interval
+
+from .base import to_ns, to_ns_array
+from .range_index import RangeIndex
+
+
+MAGIC = b"VNPYBARS"
+VERSION = 1
+HEADER_SIZE = 4096
+
+COLUMN_NAMES: Tuple[str, ...] = (
+    "datetime",
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+    "volume",
+    "turnover",
+    "open_interest",
+)
+
+# Range index saved in file, so that it is not rebuilt by scanning all bars
+INDEX_FUNCS: Dict[str, np.ufunc] = {
+    "high_price": np.maximum,
+    "low_price": np.minimum,
+    "volume": np.maximum,
+}
+
+
+class BarFile:
+    """
+    Columnar bar data file opened with numpy memmap.
+
+    The file starts with a header of HEADER_SIZE bytes, followed by one array
+    of capacity items for each column, and then block extremums of range index.
+    Only pages touched are loaded into memory by operating system.
+    """
+
+    def __init__(self, path: str, mode: str = "c") -> None:
+        """
+        mode "c" is copy-on-write: bars updated after opening are never
+        written back into file.
+        """
+        self.path: str = path
+
+        with open(path, "rb") as f:
+            header: bytes = f.read(HEADER_SIZE)
+
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a bar data file")
+
+        size: int = int.from_bytes(header[8:12], "little")
+        meta: dict = json.loads(header[12:12 + size].decode("utf-8"))
+
+        if meta["version"] != VERSION:
+            raise ValueError(f"Version {meta['version']} of bar data file is not supported")
+
+        self.count: int = meta["count"]
+        self.capacity: int = meta["capacity"]
+
+        self.symbol: str = meta["symbol"]
+        self.exchange: Exchange = Exchange(meta["exchange"]) if meta["exchange"] else None
+        self.interval: Interval = Interval(meta["interval"]) if meta["interval"] else None
+        self.gateway_name: str = meta["gateway_name"]
+        self.tzinfo: tzinfo = load_tzinfo(meta["tzinfo"])
+
+        self.columns: Dict[str, np.ndarray] = {}
+        self.blocks: Dict[str, np.ndarray] = {}
+
+        offset: int = HEADER_SIZE
+        for name in COLUMN_NAMES:
+            dtype: type = np.int64 if name == "datetime" else np.float64
+            self.columns[name] = np.memmap(
+                path, dtype=dtype, mode=mode, offset=offset, shape=(self.capacity,)
+            )
+            offset += self.capacity * 8
+
+        for name, block_count in meta["blocks"].items():
+            self.blocks[name] = np.memmap(
+                path, dtype=np.float64, mode="r", offset=offset, shape=(block_count,)
+            )
+            offset += block_count * 8
+
+
+def write_bar_file(path: str, data: "List[BarData] | pd.DataFrame", reserve: int = 0) -> None:
+    """
+    Write bar data into file which can be attached to BarManager.
+
+    data is a list of BarData or a DataFrame with columns named after fields of
+    BarData. Bars are sorted by datetime, and the last one wins for the same
+    datetime, the same as BarManager.update_history. Room of reserve bars is
+    left at the end of arrays, for updating bars after file is attached.
+    """
+    if isinstance(data, list):
+        columns, meta = convert_bars(data)
+    else:
+        columns, meta = convert_dataframe(data)
+
+    columns = sort_columns(columns)
+
+    count: int = len(columns["datetime"])
+    capacity: int = count + reserve
+
+    # Calculate block extremums for range index
+    blocks: Dict[str, np.ndarray] = {}
+    for name, func in INDEX_FUNCS.items():
+        index: RangeIndex = RangeIndex(func)
+        index.rebuild(columns[name])
+        blocks[name] = index.get_blocks()
+
+    meta.update({
+        "version": VERSION,
+        "count": count,
+        "capacity": capacity,
+        "blocks": {name: len(values) for name, values in blocks.items()},
+    })
+
+    buf: bytes = json.dumps(meta).encode("utf-8")
+    if len(buf) + 12 > HEADER_SIZE:
+        raise ValueError("Header of bar data file is too large")
+
+    header: bytes = MAGIC + len(buf).to_bytes(4, "little") + buf
+    header += b"\0" * (HEADER_SIZE - len(header))
+
+    with open(path, "wb") as f:
+        f.write(header)
+
+        for name in COLUMN_NAMES:
+            values: np.ndarray = columns[name]
+            f.write(values.tobytes())
+            f.write(b"\0" * (reserve * 8))
+
+        for values in blocks.values():
+            f.write(values.tobytes())
+
+
+def sort_columns(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Sort columns by datetime and keep the last bar of the same datetime.
+    """
+    datetimes: np.ndarray = columns["datetime"]
+    if len(datetimes) < 2 or (datetimes[1:] > datetimes[:-1]).all():
+        return columns
+
+    order: np.ndarray = np.argsort(datetimes, kind="stable")
+    datetimes = datetimes[order]
+
+    keep: np.ndarray = np.ones(len(datetimes), dtype=bool)
+    keep[:-1] = datetimes[:-1] != datetimes[1:]
+    order = order[keep]
+
+    return {name: values[order] for name, values in columns.items()}
+
+
+def convert_bars(bars: List[BarData]) -> Tuple[Dict[str, np.ndarray], dict]:
+    """
+    Convert list of bar data into columns and header meta.
+    """
+    columns: Dict[str, np.ndarray] = {
+        "datetime": np.fromiter((to_ns(bar.datetime) for bar in bars), dtype=np.int64, count=len(bars))
+    }
+
+    for name in COLUMN_NAMES[1:]:
+        columns[name] = np.fromiter((getattr(bar, name) for bar in bars), dtype=np.float64, count=len(bars))
+
+    if bars:
+        bar: BarData = bars[-1]
+        meta: dict = {
+            "symbol": bar.symbol,
+            "exchange": bar.exchange.value if bar.exchange else "",
+            "interval": bar.interval.value if bar.interval else "",
+            "gateway_name": bar.gateway_name,
+            "tzinfo": dump_tzinfo(bar.datetime.tzinfo),
+        }
+    else:
+        meta: dict = {
+            "symbol": "",
+            "exchange": "",
+            "interval": "",
+            "gateway_name": "",
+            "tzinfo": None
+        }
+
+    return columns, meta
+
+
+def convert_dataframe(df: "pd.DataFrame") -> Tuple[Dict[str, np.ndarray], dict]:
+    """
+    Convert DataFrame of bar data into columns and header meta.
+    """
+    import pandas as pd
+
+    dts: pd.Series = pd.to_datetime(df["datetime"])
+    tz: tzinfo = dts.dt.tz
+
+    if tz is not None:
+        values: np.ndarray = dts.dt.tz_convert("UTC").dt.tz_localize(None).values
+    else:
+        values: np.ndarray = dts.values
+
+    columns: Dict[str, np.ndarray] = {"datetime": to_ns_array(values)}
+
+    for name in COLUMN_NAMES[1:]:
+        if name in df:
+            columns[name] = df[name].to_numpy(dtype=np.float64)
+        else:
+            columns[name] = np.zeros(len(df), dtype=np.float64)
+
+    def get_value(name: str) -> str:
+        if name not in df or not len(df):
+            return ""
+        value = df[name].iloc[-1]
+        if hasattr(value, "value"):
+            return value.value
+        # Enum saved into csv as text like "Exchange.CZCE"
+        text: str = str(value)
+        if text.startswith(("Exchange.", "Interval.")):
+            cls: type = Exchange if text.startswith("Exchange.") else Interval
+            return cls[text.split(".")[1]].value
+        return text
+
+    meta: dict = {
+        "symbol": get_value("symbol"),
+        "exchange": get_value("exchange"),
+        "interval": get_value("interval"),
+        "gateway_name": get_value("gateway_name"),
+        "tzinfo": dump_tzinfo(tz),
+    }
+    return columns, meta
+
+
+def dump_tzinfo(tz: tzinfo) -> dict:
+    """
+    Convert tzinfo into data saved in header.
+    """
+    if tz is None:
+        return None
+
+    key: str = getattr(tz, "key", None) or getattr(tz, "zone", None)
+    if key:
+        return {"key": key}
+
+    return {"offset": tz.utcoffset(None).total_seconds()}
+
+
+def load_tzinfo(data: dict) -> tzinfo:
+    """
+    Convert data saved in header into tzinfo.
+    """
+    if not data:
+        return None
+
+    if "key" in data:
+        return ZoneInfo(data["key"])
+
+    return timezone(timedelta(seconds=data["offset"]))
@@ -1,6 +1,9 @@
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Dict, Type
+from time import perf_counter
+from typing import List, Dict, Set, Tuple, Type
 
+import numpy as np
 import pyqtgraph as pg
 
 from vnpy.trader.ui import QtGui, QtWidgets, QtCore
@@ -11,33 +14,83 @@ from .base import (
     GREY_COLOR, WHITE_COLOR, CURSOR_COLOR, BLACK_COLOR,
     to_int, NORMAL_FONT
 )
-from .axis import DatetimeAxis
-from .items import ChartItem
+from .axis import DatetimeAxis, DatetimeTicks
+from .items import ChartItem, IconEnum, LineColor
+from .loader import HistoryLoader
+from .bar_queue import BarQueue
 
 
 pg.setConfigOptions(antialias=True)
 
 
 class ChartWidget(pg.PlotWidget):
-    """"""
+    """
+    If max_bars is given, only the latest bars are kept in chart.
+
+    Bars pushed by push_bar from any thread are shown at most max_fps times
+    per second.
+    """
     MIN_BAR_COUNT = 100
 
-    def __init__(self, parent: QtWidgets.QWidget = None) -> None:
+    signal_bar: QtCore.Signal = QtCore.Signal()
+
+    # Load older page when bars left of the view are fewer than this share of page
+    LOAD_PAGE_RATIO = 0.5
+    # Drop pages when bars left of the view are more than this number of pages
+    KEEP_PAGE_COUNT = 3
+
+    def __init__(
+        self,
+        parent: QtWidgets.QWidget = None,
+        max_bars: int = None,
+        max_fps: int = 30
+    ) -> None:
         """"""
         super().__init__(parent)
 
-        self._manager: BarManager = BarManager()
+        self._manager: BarManager = BarManager(max_bars)
+
+        # Tick boundaries and labels shared by x-axis of all plots
+        self._ticks: DatetimeTicks = DatetimeTicks(self._manager)
+
+        self._queue: BarQueue = BarQueue()
+        self._drain_interval: float = 1 / max_fps
+        self._drain_time: float = 0
+
+        self._drain_timer: QtCore.QTimer = QtCore.QTimer(self)
+        self._drain_timer.setSingleShot(True)
+        self._drain_timer.timeout.connect(self._drain_bars)
+        self.signal_bar.connect(self._schedule_drain)
+
+        # Y-axis of all plots is updated once in the next event loop, no
+        # matter how many range signals are emitted before that
+        self._y_range_timer: QtCore.QTimer = QtCore.QTimer(self)
+        self._y_range_timer.setSingleShot(True)
+        self._y_range_timer.setInterval(0)
+        self._y_range_timer.timeout.connect(self._update_y_range)
+
+        self._autoscale_counts: Dict[str, int] = {"requested": 0, "passes": 0, "frames": 0}
 
         self._plots: Dict[str, pg.PlotItem] = {}
         self._items: Dict[str, ChartItem] = {}
         self._item_plot_map: Dict[ChartItem, pg.PlotItem] = {}
 
+        # Items queried for y-axis range of plots, one for each Y_RANGE_KEY
+        self._range_items: Dict[ChartItem, pg.PlotItem] = {}
+
         self._first_plot: pg.PlotItem = None
         self._cursor: ChartCursor = None
+        self._loader: HistoryLoader = None
 
         self._right_ix: int = 0                     # Index of most right data
         self._bar_count: int = self.MIN_BAR_COUNT   # Total bar visible in chart
 
+        # Y-axis range of each plot with bars before settled_count, which
+        # are all bars except the last one once updated
+        self._settled_ranges: Dict[pg.PlotItem, Tuple[float, float]] = {}
+        self._settled_count: int = 0
+        self._manager.add_listener(self._on_bars_changed)
+
         self._init_ui()
 
     def _init_ui(self) -> None:
@@ -52,7 +105,7 @@ class ChartWidget(pg.PlotWidget):
         self.setCentralItem(self._layout)
 
     def _get_new_x_axis(self) -> DatetimeAxis:
-        return DatetimeAxis(self._manager, orientation="bottom")
+        return DatetimeAxis(self._manager, orientation="bottom", ticks=self._ticks)
 
     def add_cursor(self) -> None:
         """"""
@@ -93,7 +146,7 @@ class ChartWidget(pg.PlotWidget):
 
         # Connect view change signal to update y range function
         view: pg.ViewBox = plot.getViewBox()
-        view.sigXRangeChanged.connect(self._update_y_range)
+        view.sigXRangeChanged.connect(self._schedule_y_range)
         view.setMouseEnabled(x=True, y=False)
 
         # Set right axis
@@ -129,8 +182,20 @@ class ChartWidget(pg.PlotWidget):
         plot.addItem(item)
         item.be_added_to_parent()
 
+        # Follow downsampling mode of plot set by add_plot
+        item.set_downsampling(plot.downsampleMode()[2])
+
         self._item_plot_map[item] = plot
 
+        keys: Set[Tuple[pg.PlotItem, str]] = {
+            (plot, other.Y_RANGE_KEY) for other, plot in self._range_items.items()
+        }
+        if item.Y_RANGE_KEY is None or (plot, item.Y_RANGE_KEY) not in keys:
+            self._range_items[item] = plot
+
+        self._settled_ranges.clear()
+        self._settled_count = 0
+
     def get_plot(self, plot_name: str) -> pg.PlotItem:
         """
         Get specific plot with its name.
@@ -148,6 +213,10 @@ class ChartWidget(pg.PlotWidget):
         Clear all data.
         """
         self._manager.clear_all()
+        self._queue.clear()
+
+        self._settled_ranges.clear()
+        self._settled_count = 0
 
         for item in self._items.values():
             item.clear_all()
@@ -159,43 +228,277 @@ class ChartWidget(pg.PlotWidget):
         """
         Update a list of bar data.
         """
-        self._manager.update_history(history)
+        self._update_history(history)
 
-        for item in self._items.values():
-            item.update_history(history)
+    def _update_history(self, history: List[BarData], retain: bool = True) -> None:
+        """
+        Update a list of bar data, the oldest bars are evicted for max_bars
+        only if retain is True.
+        """
+        start, end, shift = self._manager.update_history(history, retain)
 
         self._update_plot_limits()
 
+        # Keep showing the same bars if history is added in front
+        if shift:
+            self._shift_view(shift)
+
+        if shift <= 0:
+            self.move_to_right()
+
+    def attach_file(self, path: str) -> None:
+        """
+        Show bars in file written by write_bar_file.
+
+        Bars are not loaded into memory until they are shown.
+        """
+        self.clear_all()
+
+        self._manager.attach_file(path)
+
+        self._update_plot_limits()
         self.move_to_right()
 
+    def load_history(self, loader: HistoryLoader) -> None:
+        """
+        Show the latest page of bars from loader.
+
+        Older pages are loaded in background when the chart is moved close to
+        the first bar, and dropped again when moved far away from them.
+        """
+        if self._loader:
+            self._loader.signal_page.disconnect(self._process_page)
+
+        self._loader = loader
+        self._loader.signal_page.connect(self._process_page)
+
+        history: List[BarData] = loader.load_latest()
+        self.update_history(history)
+
+    def _process_page(self, history: List[BarData]) -> None:
+        """
+        Older page of bars received from loader.
+
+        Page is kept even if there are more than max_bars, otherwise it is
+        evicted at once and requested again and again. Pages far from the
+        view are dropped by _check_pages instead.
+        """
+        if history:
+            self._update_history(history, retain=False)
+
+    def _check_pages(self, min_ix: int) -> None:
+        """
+        Load or drop pages of history according to left edge of the view.
+        """
+        if not self._loader or not self._manager.get_count():
+            return
+
+        page_size: int = self._loader.page_size
+
+        if min_ix < page_size * self.LOAD_PAGE_RATIO:
+            first_dt: datetime = self._manager.get_datetime(0)
+            self._loader.request_older(first_dt)
+        elif min_ix > page_size * self.KEEP_PAGE_COUNT and not self._loader.is_loading():
+            drop_count: int = (min_ix // page_size - self.KEEP_PAGE_COUNT + 1) * page_size
+            self._drop_history(drop_count)
+
+    def _drop_history(self, count: int) -> None:
+        """
+        Drop the oldest bars in chart.
+        """
+        start, end, shift = self._manager.evict(count)
+
+        self._update_plot_limits()
+        self._shift_view(shift)
+
+        if self._loader:
+            self._loader.reset()
+
     def update_bar(self, bar: BarData) -> None:
         """
         Update single bar data.
         """
-        self._manager.update_bar(bar)
+        start, end, shift = self._manager.update_bar(bar)
+        self._update_live_range(start, end, shift)
+
+    def add_line_series(self, label: str, values: np.ndarray, color: LineColor, width: int = 1) -> None:
+        """
+        Add indicator line series, or replace values of the existing one.
+
+        values are aligned to the latest bars if there are fewer values than bars.
+        """
+        self._manager.add_line_series(label, values, color, width)
+
+    def update_line_series(self, label: str, value: float, ix: int = None) -> None:
+        """
+        Update value of line series, for the last bar by default.
+        """
+        self._manager.update_line_series(label, value, ix)
+
+    def add_icons(
+        self,
+        icon: IconEnum,
+        dts: List[datetime] | np.ndarray,
+        values: np.ndarray,
+        tag: str = ""
+    ) -> None:
+        """
+        Add many icons at once, with y values at datetimes of bars.
+
+        Icons can be removed later by tag.
+        """
+        self._manager.add_icons(icon, dts, values, tag)
+
+        for item in self._items.values():
+            item.update()
+
+        if self._cursor:
+            self._cursor.update_range(0, self._manager.get_count())
+
+    def remove_icons(self, tag: str, icon: IconEnum = None) -> None:
+        """
+        Remove all icons of tag, only of given icon if specified.
+        """
+        self._manager.remove_icons(tag, icon)
 
         for item in self._items.values():
-            item.update_bar(bar)
+            item.update()
 
+        if self._cursor:
+            self._cursor.update_range(0, self._manager.get_count())
+
+    def push_bar(self, bar: BarData) -> None:
+        """
+        Push single bar data from any thread.
+
+        Bars are shown together in the next frame, only the latest update of
+        the same bar is kept.
+        """
+        if self._queue.push(bar):
+            self.signal_bar.emit()
+
+    def get_queue_stats(self) -> Dict[str, int]:
+        """
+        Get number of bar updates pushed, merged and dropped.
+        """
+        return self._queue.get_stats()
+
+    def get_autoscale_stats(self) -> Dict[str, int]:
+        """
+        Get number of y-axis updates requested by range signals, passes of
+        y-axis updates actually run, and frames painted.
+        """
+        return dict(self._autoscale_counts)
+
+    def _schedule_drain(self) -> None:
+        """
+        Start timer to drain bars pushed, no earlier than the next frame.
+        """
+        if self._drain_timer.isActive():
+            return
+
+        delay: float = self._drain_time + self._drain_interval - perf_counter()
+        self._drain_timer.start(max(int(delay * 1000), 0))
+
+    def _drain_bars(self) -> None:
+        """
+        Show all bars pushed since the last frame.
+        """
+        self._drain_time = perf_counter()
+
+        bars: List[BarData] = self._queue.pop_all()
+        if not bars:
+            return
+
+        if len(bars) == 1:
+            start, end, shift = self._manager.update_bar(bars[0])
+        else:
+            start, end, shift = self._manager.update_history(bars)
+
+        self._update_live_range(start, end, shift)
+
+    def _update_live_range(self, start: int, end: int, shift: int) -> None:
+        """
+        Refresh chart after live bars changed, and follow the latest bar if shown.
+        """
         self._update_plot_limits()
 
+        if shift:
+            self._shift_view(shift)
+
         if self._right_ix >= (self._manager.get_count() - self._bar_count / 2):
             self.move_to_right()
 
+    def _on_bars_changed(self, start: int, end: int, shift: int) -> None:
+        """
+        Drop settled y-axis ranges if settled bars are changed or moved.
+        """
+        if shift or start < self._settled_count:
+            self._settled_ranges.clear()
+            self._settled_count = 0
+
     def _update_plot_limits(self) -> None:
         """
         Update the limit of plots.
+
+        Only bars added after the last update and the last bar are queried,
+        ranges of older bars are kept until they are changed.
         """
-        for item, plot in self._item_plot_map.items():
-            min_value, max_value = item.get_y_range()
+        count: int = self._manager.get_count()
+        settled_count: int = max(count - 1, 0)
+
+        if settled_count > self._settled_count:
+            self._settled_ranges = self._merge_ranges(
+                self._settled_ranges,
+                self._get_plot_ranges(self._settled_count, settled_count - 1)
+            )
+            self._settled_count = settled_count
+
+        ranges: Dict[pg.PlotItem, Tuple[float, float]] = self._settled_ranges
+        if count:
+            ranges = self._merge_ranges(ranges, self._get_plot_ranges(count - 1, count - 1))
+        else:
+            ranges = self._get_plot_ranges()
 
+        for plot, (min_value, max_value) in ranges.items():
             plot.setLimits(
                 xMin=-1,
-                xMax=self._manager.get_count(),
+                xMax=count,
                 yMin=min_value,
                 yMax=max_value
             )
 
+    def _get_plot_ranges(self, min_ix: int = None, max_ix: int = None) -> Dict[pg.PlotItem, Tuple[float, float]]:
+        """
+        Get y-axis range of each plot within index range [min_ix, max_ix],
+        merged from items in the plot, items with the same Y_RANGE_KEY are
+        queried once.
+        """
+        ranges: Dict[pg.PlotItem, Tuple[float, float]] = {}
+
+        for item, plot in self._range_items.items():
+            ranges = self._merge_ranges(ranges, {plot: item.get_y_range(min_ix, max_ix)})
+
+        return ranges
+
+    def _merge_ranges(
+        self,
+        ranges: Dict[pg.PlotItem, Tuple[float, float]],
+        other: Dict[pg.PlotItem, Tuple[float, float]]
+    ) -> Dict[pg.PlotItem, Tuple[float, float]]:
+        """
+        Merge y-axis ranges of plots into a new dict.
+        """
+        merged: Dict[pg.PlotItem, Tuple[float, float]] = dict(ranges)
+
+        for plot, (min_value, max_value) in other.items():
+            if plot in merged:
+                min_value = min(min_value, merged[plot][0])
+                max_value = max(max_value, merged[plot][1])
+            merged[plot] = (min_value, max_value)
+
+        return merged
+
     def _update_x_range(self) -> None:
         """
         Update the x-axis range of plots.
@@ -206,10 +509,27 @@ class ChartWidget(pg.PlotWidget):
         for plot in self._plots.values():
             plot.setRange(xRange=(min_ix, max_ix), padding=0)
 
+        # Range signals emitted above are handled in one pass at once, so that
+        # cursor is updated with the new y-axis range
+        if self._first_plot:
+            self._update_y_range()
+
+    def _schedule_y_range(self) -> None:
+        """
+        Update y-axis range in the next event loop, once for all plots.
+        """
+        self._autoscale_counts["requested"] += 1
+
+        if not self._y_range_timer.isActive():
+            self._y_range_timer.start()
+
     def _update_y_range(self) -> None:
         """
         Update the y-axis range of plots.
         """
+        self._y_range_timer.stop()
+        self._autoscale_counts["passes"] += 1
+
         view: pg.ViewBox = self._first_plot.getViewBox()
         view_range: list = view.viewRange()
 
@@ -217,14 +537,23 @@ class ChartWidget(pg.PlotWidget):
         max_ix: int = min(self._manager.get_count(), int(view_range[0][1]))
 
         # Update limit for y-axis
-        for item, plot in self._item_plot_map.items():
-            y_range: tuple = item.get_y_range(min_ix, max_ix)
+        for plot, y_range in self._get_plot_ranges(min_ix, max_ix).items():
             plot.setRange(yRange=y_range)
 
+        self._check_pages(min_ix)
+
     def paintEvent(self, event: QtGui.QPaintEvent) -> None:
         """
         Reimplement this method of parent to update current max_ix value.
+
+        Pending y-axis update is done before painting, so that no frame is
+        painted with outdated y-axis range.
         """
+        if self._y_range_timer.isActive():
+            self._update_y_range()
+
+        self._autoscale_counts["frames"] += 1
+
         view: pg.ViewBox = self._first_plot.getViewBox()
         view_range: list = view.viewRange()
         self._right_ix = max(0, view_range[0][1])
@@ -297,17 +626,35 @@ class ChartWidget(pg.PlotWidget):
         self._update_x_range()
         self._cursor.update_info()
 
+    def _shift_view(self, shift: int) -> None:
+        """
+        Move chart and cursor after indexes of bars are moved by shift.
+        """
+        self._right_ix += shift
+        self._update_x_range()
+
+        if self._cursor:
+            self._cursor.shift(shift)
+
     def move_to_right(self) -> None:
         """
         Move chart to the most right.
         """
         self._right_ix = self._manager.get_count()
         self._update_x_range()
-        self._cursor.update_info()
+
+        if self._cursor:
+            self._cursor.update_info()
 
 
 class ChartCursor(QtCore.QObject):
-    """"""
+    """
+    Mouse moves are merged and handled once per event loop. Info text of each
+    item is cached by bar index until the bar is changed.
+    """
+
+    # Max number of info texts cached for (item, index)
+    INFO_CACHE_SIZE = 4096
 
     def __init__(
         self,
@@ -328,9 +675,28 @@ class ChartCursor(QtCore.QObject):
         self._y: int = 0
         self._plot_name: str = ""
 
+        # Latest mouse position not handled yet
+        self._mouse_pos: QtCore.QPointF = None
+        self._mouse_timer: QtCore.QTimer = QtCore.QTimer(self)
+        self._mouse_timer.setSingleShot(True)
+        self._mouse_timer.setInterval(0)
+        self._mouse_timer.timeout.connect(self._update_mouse)
+
+        self._info_texts: OrderedDict[Tuple[ChartItem, int], str] = OrderedDict()
+
+        # Bar indexes shown by x label and info, None if outdated
+        self._label_ix: int = None
+        self._info_ix: int = None
+
+        # Positions of labels and info in view coordinates, dropped when view changes
+        self._bottom_right: QtCore.QPointF = None
+        self._top_lefts: Dict[str, QtCore.QPointF] = {}
+
         self._init_ui()
         self._connect_signal()
 
+        self._manager.add_listener(self.update_range)
+
     def _init_ui(self) -> None:
         """"""
         self._init_line()
@@ -377,6 +743,9 @@ class ChartCursor(QtCore.QObject):
             plot.addItem(label, ignoreBounds=True)
             self._y_labels[plot_name] = label
 
+        self._bottom_plot: pg.PlotItem = plot
+        self._bottom_view: pg.ViewBox = plot.getViewBox()
+
         self._x_label: pg.TextItem = pg.TextItem(
             "datetime", fill=CURSOR_COLOR, color=BLACK_COLOR)
         self._x_label.hide()
@@ -407,15 +776,31 @@ class ChartCursor(QtCore.QObject):
         """
         self._widget.scene().sigMouseMoved.connect(self._mouse_moved)
 
+        for view in self._views.values():
+            view.sigTransformChanged.connect(self._view_changed)
+
     def _mouse_moved(self, evt: tuple) -> None:
         """
         Callback function when mouse is moved.
+
+        Only the latest position is kept until the next event loop.
         """
         if not self._manager.get_count():
             return
 
-        # First get current mouse point
-        pos: tuple = evt
+        self._mouse_pos = evt
+
+        if not self._mouse_timer.isActive():
+            self._mouse_timer.start()
+
+    def _update_mouse(self) -> None:
+        """
+        Update cursor with the latest mouse position.
+        """
+        pos: QtCore.QPointF = self._mouse_pos
+        if pos is None or not self._manager.get_count():
+            return
+        self._mouse_pos = None
 
         for plot_name, view in self._views.items():
             rect = view.sceneBoundingRect()
@@ -445,17 +830,41 @@ class ChartCursor(QtCore.QObject):
             else:
                 h_line.hide()
 
+    def _view_changed(self) -> None:
+        """
+        Drop positions of labels and info after any view is moved or resized.
+        """
+        self._bottom_right = None
+        self._top_lefts.clear()
+
+    def _get_bottom_right(self) -> QtCore.QPointF:
+        """
+        Get bottom right position of the bottom view, next to axes.
+        """
+        if self._bottom_right is None:
+            axis_width = self._bottom_plot.getAxis("right").width()
+            axis_height = self._bottom_plot.getAxis("bottom").height()
+            axis_offset: QtCore.QPointF = QtCore.QPointF(axis_width, axis_height)
+
+            self._bottom_right = self._bottom_view.mapSceneToView(
+                self._bottom_view.sceneBoundingRect().bottomRight() - axis_offset
+            )
+        return self._bottom_right
+
+    def _get_top_left(self, plot_name: str) -> QtCore.QPointF:
+        """
+        Get top left position of view of plot.
+        """
+        top_left: QtCore.QPointF = self._top_lefts.get(plot_name, None)
+        if top_left is None:
+            view: pg.ViewBox = self._views[plot_name]
+            top_left = view.mapSceneToView(view.sceneBoundingRect().topLeft())
+            self._top_lefts[plot_name] = top_left
+        return top_left
+
     def _update_label(self) -> None:
         """"""
-        bottom_plot: pg.PlotItem = list(self._plots.values())[-1]
-        axis_width = bottom_plot.getAxis("right").width()
-        axis_height = bottom_plot.getAxis("bottom").height()
-        axis_offset: QtCore.QPointF = QtCore.QPointF(axis_width, axis_height)
-
-        bottom_view: pg.ViewBox = list(self._views.values())[-1]
-        bottom_right = bottom_view.mapSceneToView(
-            bottom_view.sceneBoundingRect().bottomRight() - axis_offset
-        )
+        bottom_right: QtCore.QPointF = self._get_bottom_right()
 
         for plot_name, label in self._y_labels.items():
             if plot_name == self._plot_name:
@@ -465,35 +874,89 @@ class ChartCursor(QtCore.QObject):
             else:
                 label.hide()
 
-        dt: datetime = self._manager.get_datetime(self._x)
-        if dt:
+        if self._x != self._label_ix:
+            dt: datetime = self._manager.get_datetime(self._x)
+            if not dt:
+                return
+
             self._x_label.setText(dt.strftime("%Y-%m-%d %H:%M:%S"))
-            self._x_label.show()
-            self._x_label.setPos(self._x, bottom_right.y())
             self._x_label.setAnchor((0, 0))
+            self._label_ix = self._x
+
+        self._x_label.show()
+        self._x_label.setPos(self._x, bottom_right.y())
 
     def update_info(self) -> None:
-        """"""
-        buf: dict = {}
+        """
+        Show info text of bar at cursor, which is rebuilt only when cursor is
+        moved to another bar or the bar is changed.
+        """
+        if self._x != self._info_ix:
+            buf: dict = {}
 
-        for item, plot in self._item_plot_map.items():
-            item_info_text: str = item.get_info_text(self._x)
+            for item, plot in self._item_plot_map.items():
+                item_info_text: str = self._get_info_text(item, self._x)
 
-            if plot not in buf:
-                buf[plot] = item_info_text
-            else:
-                if item_info_text:
-                    buf[plot] += ("\n\n" + item_info_text)
+                if plot not in buf:
+                    buf[plot] = item_info_text
+                else:
+                    if item_info_text:
+                        buf[plot] += ("\n\n" + item_info_text)
 
-        for plot_name, plot in self._plots.items():
-            plot_info_text: str = buf[plot]
-            info: pg.TextItem = self._infos[plot_name]
-            info.setText(plot_info_text)
+            for plot_name, plot in self._plots.items():
+                self._infos[plot_name].setText(buf[plot])
+
+            self._info_ix = self._x
+
+        for plot_name, info in self._infos.items():
             info.show()
+            info.setPos(self._get_top_left(plot_name))
 
-            view: pg.ViewBox = self._views[plot_name]
-            top_left = view.mapSceneToView(view.sceneBoundingRect().topLeft())
-            info.setPos(top_left)
+    def _get_info_text(self, item: ChartItem, ix: int) -> str:
+        """
+        Get info text of item from cache, least recently used texts are
+        dropped when there are more than INFO_CACHE_SIZE.
+        """
+        key: Tuple[ChartItem, int] = (item, ix)
+
+        text: str = self._info_texts.get(key, None)
+        if text is not None:
+            self._info_texts.move_to_end(key)
+            return text
+
+        text = item.get_info_text(ix)
+        self._info_texts[key] = text
+
+        if len(self._info_texts) > self.INFO_CACHE_SIZE:
+            self._info_texts.popitem(last=False)
+
+        return text
+
+    def update_range(self, start: int, end: int, shift: int = 0) -> None:
+        """
+        Drop cached info texts of bars changed within index range [start, end).
+
+        All texts are dropped if indexes of existing bars are moved by shift.
+        """
+        if shift:
+            self._info_texts.clear()
+            self._label_ix = None
+            self._info_ix = None
+            return
+
+        if (end - start) * len(self._item_plot_map) < len(self._info_texts):
+            for ix in range(start, end):
+                for item in self._item_plot_map:
+                    self._info_texts.pop((item, ix), None)
+        else:
+            for key in [key for key in self._info_texts if start <= key[1] < end]:
+                self._info_texts.pop(key)
+
+        if self._label_ix is not None and start <= self._label_ix < end:
+            self._label_ix = None
+
+        if self._info_ix is not None and start <= self._info_ix < end:
+            self._info_ix = None
 
     def move_right(self) -> None:
         """
@@ -515,6 +978,19 @@ class ChartCursor(QtCore.QObject):
 
         self._update_after_move()
 
+    def shift(self, shift: int) -> None:
+        """
+        Move cursor index after indexes of bars are moved by shift.
+        """
+        self._x = min(max(self._x + shift, 0), self._manager.get_count() - 1)
+
+        # Only move lines and labels already shown
+        if self._plot_name:
+            self._update_line()
+            self._update_label()
+
+        self.update_info()
+
     def _update_after_move(self) -> None:
         """
         Update cursor after moved by left/right.
@@ -533,6 +1009,11 @@ class ChartCursor(QtCore.QObject):
         self._y = 0
         self._plot_name = ""
 
+        self._mouse_pos = None
+        self._info_texts.clear()
+        self._label_ix = None
+        self._info_ix = None
+
         for line in list(self._v_lines.values()) + list(self._h_lines.values()):
             line.hide()
 